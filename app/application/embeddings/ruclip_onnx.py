@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import ruclip
+import torch
+
+# Включение ONNX-бэкенда: RUCLIP_ONNX=1.
+# На x86 с VNNI динамическая INT8-квантизация даёт ~2-4x ускорение
+# энкодеров по сравнению с eager-PyTorch при практически той же точности.
+
+MODEL_NAME = "ruclip-vit-base-patch32-224"
+
+_CACHE_DIR = Path.home() / ".cache" / "ruclip_onnx"
+
+_VISION_FP32_PATH = _CACHE_DIR / "ruclip_vision.onnx"
+_VISION_INT8_PATH = _CACHE_DIR / "ruclip_vision.int8.onnx"
+_TEXT_FP32_PATH = _CACHE_DIR / "ruclip_text.onnx"
+_TEXT_INT8_PATH = _CACHE_DIR / "ruclip_text.int8.onnx"
+
+# Константы нормализации CLIP (RGB)
+_IMAGE_SIZE = 224
+_IMAGE_MEAN = np.array([0.48145466, 0.4578275, 0.40821073], dtype=np.float32)
+_IMAGE_STD = np.array([0.26862954, 0.26130258, 0.27577711], dtype=np.float32)
+
+_SESSIONS: Optional[Tuple[object, object]] = None
+_PROCESSOR = None
+_WARNED_NO_ORT = False
+
+
+def is_enabled() -> bool:
+    """
+    ONNX-бэкенд активен, только если он явно включён через RUCLIP_ONNX=1
+    и onnxruntime реально установлен. Иначе используется torch-путь.
+    """
+    global _WARNED_NO_ORT
+
+    if os.getenv("RUCLIP_ONNX", "0") != "1":
+        return False
+
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        if not _WARNED_NO_ORT:
+            print(
+                "[WARN] RUCLIP_ONNX=1, но onnxruntime не установлен — "
+                "используем PyTorch-бэкенд."
+            )
+            _WARNED_NO_ORT = True
+        return False
+
+    return True
+
+
+class _VisionTower(torch.nn.Module):
+    """
+    Обёртка над encode_image для трассировки в ONNX.
+    """
+
+    def __init__(self, clip_model) -> None:
+        super().__init__()
+        self.clip_model = clip_model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.clip_model.encode_image(pixel_values)
+
+
+class _TextTower(torch.nn.Module):
+    """
+    Обёртка над encode_text для трассировки в ONNX.
+    """
+
+    def __init__(self, clip_model) -> None:
+        super().__init__()
+        self.clip_model = clip_model
+
+    def forward(self, input_ids: torch.Tensor) -> torch.Tensor:
+        return self.clip_model.encode_text(input_ids)
+
+
+def _export_onnx() -> None:
+    """
+    Одноразовый экспорт vision/text-башен ruCLIP в ONNX + INT8-квантизация.
+
+    Результат кэшируется в ~/.cache/ruclip_onnx/ — torch-модель
+    загружается только при первом экспорте.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    clip_model, processor = ruclip.load(MODEL_NAME, device="cpu")
+    clip_model.eval()
+
+    global _PROCESSOR
+    _PROCESSOR = processor
+
+    context_length = int(getattr(clip_model, "context_length", 77))
+
+    with torch.no_grad():
+        dummy_image = torch.zeros(1, 3, _IMAGE_SIZE, _IMAGE_SIZE)
+        torch.onnx.export(
+            _VisionTower(clip_model),
+            dummy_image,
+            str(_VISION_FP32_PATH),
+            opset_version=17,
+            input_names=["pixel_values"],
+            output_names=["image_latents"],
+            dynamic_axes={
+                "pixel_values": {0: "batch"},
+                "image_latents": {0: "batch"},
+            },
+        )
+
+        dummy_text = torch.zeros(1, context_length, dtype=torch.long)
+        torch.onnx.export(
+            _TextTower(clip_model),
+            dummy_text,
+            str(_TEXT_FP32_PATH),
+            opset_version=17,
+            input_names=["input_ids"],
+            output_names=["text_latents"],
+            dynamic_axes={
+                "input_ids": {0: "batch"},
+                "text_latents": {0: "batch"},
+            },
+        )
+
+    quantize_dynamic(
+        str(_VISION_FP32_PATH),
+        str(_VISION_INT8_PATH),
+        weight_type=QuantType.QInt8,
+    )
+    quantize_dynamic(
+        str(_TEXT_FP32_PATH),
+        str(_TEXT_INT8_PATH),
+        weight_type=QuantType.QInt8,
+    )
+
+
+def _get_processor():
+    """
+    Ленивая загрузка ruCLIP-процессора (токенизация текста).
+    """
+    global _PROCESSOR
+
+    if _PROCESSOR is None:
+        _, _PROCESSOR = ruclip.load(MODEL_NAME, device="cpu")
+
+    return _PROCESSOR
+
+
+def _get_sessions() -> Tuple[object, object]:
+    """
+    Ленивая инициализация ORT-сессий (vision, text).
+    При отсутствии кэшированных INT8-моделей выполняет экспорт.
+    """
+    global _SESSIONS
+
+    if _SESSIONS is None:
+        import onnxruntime as ort
+
+        if not (_VISION_INT8_PATH.exists() and _TEXT_INT8_PATH.exists()):
+            _export_onnx()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = os.cpu_count() or 1
+
+        vision_session = ort.InferenceSession(
+            str(_VISION_INT8_PATH),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        text_session = ort.InferenceSession(
+            str(_TEXT_INT8_PATH),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+        _SESSIONS = (vision_session, text_session)
+
+    return _SESSIONS
+
+
+def _preprocess_bgr(image_bgr: np.ndarray) -> np.ndarray:
+    """
+    BGR-кадр -> нормализованный CHW float32 (вход vision-башни).
+    """
+    resized = cv2.resize(
+        image_bgr,
+        (_IMAGE_SIZE, _IMAGE_SIZE),
+        interpolation=cv2.INTER_AREA,
+    )
+    rgb = resized[..., ::-1].astype(np.float32) / 255.0
+    normalized = (rgb - _IMAGE_MEAN) / _IMAGE_STD
+    return normalized.transpose(2, 0, 1)
+
+
+def _l2_normalize(latents: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(latents, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return latents / norms
+
+
+def compute_image_vectors(images: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    L2-нормированные эмбеддинги изображений через INT8 ONNX-сессию.
+    """
+    vision_session, _ = _get_sessions()
+
+    batch = np.stack([_preprocess_bgr(img) for img in images])
+    (latents,) = vision_session.run(None, {"pixel_values": batch})
+
+    return _l2_normalize(latents.astype(np.float32))
+
+
+def compute_text_vector(text: str) -> List[float]:
+    """
+    L2-нормированный эмбеддинг текста через INT8 ONNX-сессию.
+    """
+    _, text_session = _get_sessions()
+    processor = _get_processor()
+
+    inputs = processor(text=[text], return_tensors="pt", padding=True)
+    input_ids = inputs["input_ids"].numpy().astype(np.int64)
+
+    (latents,) = text_session.run(None, {"input_ids": input_ids})
+
+    return _l2_normalize(latents.astype(np.float32))[0].tolist()
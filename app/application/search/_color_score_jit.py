@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import numba
+
+# Целочисленные коды цветов: Numba плохо работает со строками,
+# поэтому публичный compute_color_score маппит название в код заранее.
+RED = 0
+ORANGE = 1
+YELLOW = 2
+GREEN = 3
+BLUE = 4
+PURPLE = 5
+BROWN = 6
+WHITE = 7
+GRAY = 8
+BLACK = 9
+
+
+@numba.njit(cache=True)
+def _clamp(value: float, min_value: float, max_value: float) -> float:
+    """
+    Ограничивает значение в пределах [min_value; max_value].
+    """
+    if value < min_value:
+        return min_value
+    if value > max_value:
+        return max_value
+    return value
+
+
+@numba.njit(cache=True)
+def _hue_ref(color_code: int) -> float:
+    """
+    Референсный Hue (в градусах) для хроматического цвета.
+    """
+    if color_code == RED:
+        return 0.0
+    if color_code == ORANGE:
+        return 30.0
+    if color_code == YELLOW:
+        return 55.0
+    if color_code == GREEN:
+        return 120.0
+    if color_code == BLUE:
+        return 220.0
+    if color_code == PURPLE:
+        return 275.0
+    # BROWN: Hue рядом с оранжевым
+    return 25.0
+
+
+@numba.njit(cache=True)
+def _circular_hue_distance(h: float, ref_h: float) -> float:
+    """
+    Круговое расстояние по Hue в градусах, [0; 180].
+    """
+    d_raw = abs(h - ref_h)
+    return min(d_raw, 360.0 - d_raw)
+
+
+@numba.njit(cache=True)
+def _hue_score(d_h: float) -> float:
+    """
+    Расстояние по Hue -> оценка [0.0; 1.0], линейное затухание до 40°.
+    """
+    if d_h >= 40.0:
+        return 0.0
+    return 1.0 - (d_h / 40.0)
+
+
+@numba.njit(cache=True)
+def _chromatic_s_score(s: float) -> float:
+    """
+    Оценка насыщенности для хроматических цветов.
+    """
+    if s <= 0.05:
+        return 0.0
+    if s >= 0.5:
+        return 1.0
+    return (s - 0.05) / (0.5 - 0.05)
+
+
+@numba.njit(cache=True)
+def _chromatic_v_score(v: float) -> float:
+    """
+    Оценка яркости для хроматических цветов (кусочно-линейная,
+    мягко штрафует только крайние значения).
+    """
+    if v <= 0.1:
+        return 0.4
+    if v <= 0.4:
+        return 0.4 + (v - 0.1) * (1.0 - 0.4) / (0.4 - 0.1)
+    if v <= 0.8:
+        return 1.0
+    if v <= 0.95:
+        return 1.0 - (v - 0.8) * (1.0 - 0.5) / (0.95 - 0.8)
+    return 0.5
+
+
+@numba.njit(cache=True)
+def _brown_v_score(v: float) -> float:
+    """
+    Оценка яркости для 'brown' — треугольник с максимумом при v ≈ 0.4.
+    """
+    if v <= 0.1 or v >= 0.8:
+        return 0.0
+    if v <= 0.4:
+        return (v - 0.1) / (0.4 - 0.1)
+    return (0.8 - v) / (0.8 - 0.4)
+
+
+@numba.njit(cache=True)
+def _brown_s_score(s: float) -> float:
+    """
+    Оценка насыщенности для 'brown' — линейный рост между 0.3 и 0.8.
+    """
+    if s <= 0.3:
+        return 0.0
+    if s >= 0.8:
+        return 1.0
+    return (s - 0.3) / (0.8 - 0.3)
+
+
+@numba.njit(cache=True)
+def _white_score(s: float, v: float) -> float:
+    """
+    Оценка соответствия 'white': низкая насыщенность + высокая яркость.
+    """
+    if s <= 0.1:
+        s_component = 1.0
+    elif s >= 0.4:
+        s_component = 0.0
+    else:
+        s_component = 1.0 - (s - 0.1) / (0.4 - 0.1)
+
+    if v <= 0.4:
+        v_component = 0.0
+    elif v >= 0.7:
+        v_component = 1.0
+    else:
+        v_component = (v - 0.4) / (0.7 - 0.4)
+
+    return _clamp(s_component * v_component, 0.0, 1.0)
+
+
+@numba.njit(cache=True)
+def _gray_score(s: float, v: float) -> float:
+    """
+    Оценка соответствия 'gray': низкая насыщенность + средняя яркость.
+    """
+    if s <= 0.0:
+        s_component = 1.0
+    elif s >= 0.4:
+        s_component = 0.0
+    else:
+        s_component = 1.0 - (s / 0.4)
+
+    if v <= 0.2 or v >= 0.9:
+        v_component = 0.0
+    elif v <= 0.5:
+        v_component = (v - 0.2) / (0.5 - 0.2)
+    else:
+        v_component = (0.9 - v) / (0.9 - 0.5)
+
+    return _clamp(s_component * v_component, 0.0, 1.0)
+
+
+@numba.njit(cache=True)
+def _black_score(v: float) -> float:
+    """
+    Оценка соответствия 'black': плавное падение между v=0.12 и v=0.5.
+    """
+    if v <= 0.12:
+        return 1.0
+    if v >= 0.50:
+        return 0.0
+    return 1.0 - (v - 0.12) / (0.50 - 0.12)
+
+
+@numba.njit(cache=True)
+def compute_color_score_jit(color_code: int, h: float, s: float, v: float) -> float:
+    """
+    Скомпилированное скалярное ядро оценки цвета.
+
+    Математика идентична батчевой NumPy-версии в color_score.py;
+    njit убирает Python-диспатч на каждой ветке для потоковых
+    вызовов по одному кандидату.
+    """
+    h = _clamp(h, 0.0, 360.0)
+    s = _clamp(s, 0.0, 1.0)
+    v = _clamp(v, 0.0, 1.0)
+
+    if color_code == WHITE:
+        return _white_score(s, v)
+    if color_code == GRAY:
+        return _gray_score(s, v)
+    if color_code == BLACK:
+        return _black_score(v)
+
+    d_h = _circular_hue_distance(h, _hue_ref(color_code))
+    hue_component = _hue_score(d_h)
+
+    if color_code == BROWN:
+        # Для brown по-прежнему строгие ограничения по S/V
+        score = hue_component * _brown_s_score(s) * _brown_v_score(v)
+    else:
+        sv_component = (_chromatic_s_score(s) + _chromatic_v_score(v)) / 2.0
+        score = hue_component * sv_component
+
+    return _clamp(score, 0.0, 1.0)
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 import re
 
+import ahocorasick
+
 
 class QueryObjectType(str, Enum):
     PERSON = "PERSON"
@@ -104,6 +107,9 @@ _COLOR_PATTERNS: Dict[str, List[str]] = {
 }
 
 
+# Схлопывание повторяющихся пробелов (компилируем один раз)
+_WS_RE = re.compile(r"\s+")
+
 # Регулярка для российского номера (упрощённо), допускаем пробелы
 # Примеры: А123ВС77, A123BC 77, а123вс777
 _PLATE_REGEX = re.compile(
@@ -112,20 +118,84 @@ _PLATE_REGEX = re.compile(
 )
 
 
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """
+    Собирает единый Aho-Corasick автомат по всем таблицам ключевых слов.
+
+    Вместо O(токены x паттерны) проверок `pattern in token` все цвета,
+    одежда и типы находятся одним O(n)-проходом по тексту. Значение
+    узла — список (kind, payload, priority): один и тот же паттерн
+    теоретически может принадлежать нескольким таблицам.
+
+    priority для цветов сохраняет порядок _COLOR_PATTERNS: если в одном
+    токене совпало несколько цветовых основ, выигрывает более ранняя
+    (как в старом последовательном переборе словаря).
+    """
+    entries: Dict[str, List[Tuple[str, Optional[str], int]]] = {}
+
+    def _add(pattern: str, kind: str, payload: Optional[str], priority: int) -> None:
+        entries.setdefault(pattern, []).append((kind, payload, priority))
+
+    priority = 0
+    for color_name, patterns in _COLOR_PATTERNS.items():
+        for pattern in patterns:
+            _add(pattern, "color", color_name, priority)
+            priority += 1
+
+    for keyword in _UPPER_CLOTHES_KEYWORDS:
+        _add(keyword, "upper", None, 0)
+    for keyword in _LOWER_CLOTHES_KEYWORDS:
+        _add(keyword, "lower", None, 0)
+    for keyword in _PERSON_KEYWORDS:
+        _add(keyword, "person", None, 0)
+    for keyword in _TRANSPORT_KEYWORDS:
+        _add(keyword, "transport", None, 0)
+
+    automaton = ahocorasick.Automaton()
+    for pattern, values in entries.items():
+        automaton.add_word(pattern, (pattern, values))
+    automaton.make_automaton()
+
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+@dataclass
+class _KeywordScan:
+    """
+    Результат одного прохода автомата по нормализованному тексту.
+    """
+    tokens: List[str] = field(default_factory=list)
+    colors: List[Tuple[int, str]] = field(default_factory=list)
+    upper_indices: List[int] = field(default_factory=list)
+    lower_indices: List[int] = field(default_factory=list)
+    person_keywords: set = field(default_factory=set)
+    transport_keywords: set = field(default_factory=set)
+
+
+@lru_cache(maxsize=2048)
 def parse_query(text: str) -> ParsedQuery:
     """
     Основная функция разбора текстового запроса.
     Возвращает ParsedQuery с извлечёнными полями.
+
+    Результат кэшируется по исходной строке: повторные запросы
+    (воркеры, перезапуски поиска) не платят за разбор заново,
+    ParsedQuery заморожен и безопасен для шаринга из кэша.
     """
     normalized_text = _normalize_text(text)
 
     plate, text_without_plate = _extract_plate(normalized_text)
-    obj_type = _detect_type(normalized_text)
-    colors, tokens = _detect_colors_with_tokens(normalized_text)
+
+    scan = _scan_keywords(normalized_text)
+    obj_type = _detect_type(scan)
 
     upper_color, lower_color, generic_color = _split_colors_by_clothes(
-        colors,
-        tokens,
+        scan.colors,
+        scan.upper_indices,
+        scan.lower_indices,
         obj_type,
     )
 
@@ -154,8 +224,18 @@ def _normalize_text(text: str) -> str:
     заменяем повторяющиеся пробелы одним.
     """
     lowered = text.strip().lower()
+
+    # Чаще всего текст уже чистый — не гоняем regex зря
+    if (
+        "  " not in lowered
+        and "\t" not in lowered
+        and "\n" not in lowered
+        and "\r" not in lowered
+    ):
+        return lowered
+
     # убираем лишние пробелы
-    return re.sub(r"\s+", " ", lowered)
+    return _WS_RE.sub(" ", lowered)
 
 
 def _extract_plate(text: str) -> Tuple[Optional[str], str]:
@@ -184,13 +264,64 @@ def _extract_plate(text: str) -> Tuple[Optional[str], str]:
     return normalized_plate, text_without_plate
 
 
-def _detect_type(text: str) -> Optional[QueryObjectType]:
+def _scan_keywords(text: str) -> _KeywordScan:
+    """
+    Один проход автомата по тексту: собирает цвета (с индексами токенов),
+    индексы токенов верхней/нижней одежды и найденные ключевые слова типов.
+    """
+    scan = _KeywordScan()
+    scan.tokens = text.split()
+
+    # Границы токенов, чтобы маппить позицию совпадения в индекс токена.
+    bounds: List[Tuple[int, int]] = []
+    cursor = 0
+    for token in scan.tokens:
+        start = text.index(token, cursor)
+        bounds.append((start, start + len(token)))
+        cursor = start + len(token)
+
+    # Лучший (по priority) цвет на токен — не более одного цвета с токена,
+    # как и при старом последовательном переборе.
+    token_color: Dict[int, Tuple[int, str]] = {}
+
+    bound_idx = 0
+    for end_pos, (pattern, values) in _KEYWORD_AUTOMATON.iter(text):
+        # Паттерны не содержат пробелов, совпадение всегда внутри токена.
+        while bound_idx < len(bounds) and bounds[bound_idx][1] <= end_pos:
+            bound_idx += 1
+        if bound_idx >= len(bounds):
+            break
+
+        token_idx = bound_idx
+
+        for kind, payload, priority in values:
+            if kind == "color":
+                best = token_color.get(token_idx)
+                if best is None or priority < best[0]:
+                    token_color[token_idx] = (priority, payload)
+            elif kind == "upper":
+                scan.upper_indices.append(token_idx)
+            elif kind == "lower":
+                scan.lower_indices.append(token_idx)
+            elif kind == "person":
+                scan.person_keywords.add(pattern)
+            else:
+                scan.transport_keywords.add(pattern)
+
+    scan.colors = [
+        (idx, color)
+        for idx, (_, color) in sorted(token_color.items())
+    ]
+    return scan
+
+
+def _detect_type(scan: _KeywordScan) -> Optional[QueryObjectType]:
     """
     Определяет тип объекта (PERSON или TRANSPORT) по ключевым словам.
     Если ничего не найдено или совпадения равны — возвращает None.
     """
-    person_score = _count_keyword_hits(text, _PERSON_KEYWORDS)
-    transport_score = _count_keyword_hits(text, _TRANSPORT_KEYWORDS)
+    person_score = len(scan.person_keywords)
+    transport_score = len(scan.transport_keywords)
 
     if person_score == 0 and transport_score == 0:
         return None
@@ -204,51 +335,10 @@ def _detect_type(text: str) -> Optional[QueryObjectType]:
     return None
 
 
-def _count_keyword_hits(text: str, keywords: List[str]) -> int:
-    """
-    Считает количество вхождений ключевых слов как подстрок.
-    Работает достаточно грубо, но для наших целей достаточно.
-    """
-    score = 0
-    for keyword in keywords:
-        if keyword in text:
-            score += 1
-    return score
-
-
-def _detect_colors_with_tokens(text: str) -> Tuple[List[Tuple[int, str]], List[str]]:
-    """
-    Возвращает:
-    - список найденных цветов в виде (индекс_токена, нормализованный_цвет)
-    - список токенов (строк)
-    """
-    tokens = text.split()
-    found: List[Tuple[int, str]] = []
-
-    for idx, token in enumerate(tokens):
-        normalized_token = token.strip(",.!?;:")
-        color = _match_color(normalized_token)
-        if color is not None:
-            found.append((idx, color))
-
-    return found, tokens
-
-
-def _match_color(token: str) -> Optional[str]:
-    """
-    Возвращает базовый цвет по токену, если он похож на один из известных.
-    Проверка по подстроке-основе ('красн', 'син', 'blue' и т.д.).
-    """
-    for color_name, patterns in _COLOR_PATTERNS.items():
-        for pattern in patterns:
-            if pattern in token:
-                return color_name
-    return None
-
-
 def _split_colors_by_clothes(
     colors: List[Tuple[int, str]],
-    tokens: List[str],
+    upper_indices: List[int],
+    lower_indices: List[int],
     obj_type: Optional[QueryObjectType],
 ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
@@ -264,18 +354,15 @@ def _split_colors_by_clothes(
     lower_color: Optional[str] = None
 
     # Для привязки цвета к одежде используем ближайший цвет к ключевому слову
-    for idx, token in enumerate(tokens):
-        token_clean = token.strip(",.!?;:")
-
-        if _token_matches_any(token_clean, _UPPER_CLOTHES_KEYWORDS):
-            nearest_color = _closest_color_for_index(colors, idx)
-            if nearest_color and upper_color is None:
-                upper_color = nearest_color
+    for idx in upper_indices:
+        nearest_color = _closest_color_for_index(colors, idx)
+        if nearest_color and upper_color is None:
+            upper_color = nearest_color
 
-        if _token_matches_any(token_clean, _LOWER_CLOTHES_KEYWORDS):
-            nearest_color = _closest_color_for_index(colors, idx)
-            if nearest_color and lower_color is None:
-                lower_color = nearest_color
+    for idx in lower_indices:
+        nearest_color = _closest_color_for_index(colors, idx)
+        if nearest_color and lower_color is None:
+            lower_color = nearest_color
 
     # Если верх/низ не определились, но есть хотя бы один цвет — считаем его общим
     if upper_color is None and lower_color is None and colors:
@@ -286,17 +373,6 @@ def _split_colors_by_clothes(
     return upper_color, lower_color, generic_color
 
 
-def _token_matches_any(token: str, patterns: List[str]) -> bool:
-    """
-    Проверяет, содержит ли токен какую-либо из указанных подстрок.
-    Используем подстроки типа 'куртк', 'джинс', чтобы немного сгладить падежи.
-    """
-    for pattern in patterns:
-        if pattern in token:
-            return True
-    return False
-
-
 def _closest_color_for_index(
     colors: List[Tuple[int, str]],
     index: int,
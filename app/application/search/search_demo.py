@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime
+import os
 import sys
 
 from app.config import PROJECT_ROOT
@@ -13,6 +14,10 @@ from app.application.video.frame_snapshot import save_frame_with_optional_bbox
 
 MAX_CANDIDATES = 2000
 
+# Сколько кадров сохраняем одновременно: декод кадра — CPU-bound
+# в пуле потоков, поэтому привязываем лимит к числу ядер.
+_SAVE_CONCURRENCY = os.cpu_count() or 4
+
 
 async def main() -> None:
     config = load_config_from_env()
@@ -54,14 +59,27 @@ async def main() -> None:
         if not hits:
             return
 
-        # 3. Каталог для сохранения кадров
+        # 3. Каталог для сохранения кадров. Результаты раскладываем по
+        # шардам на 256 файлов: листинг каталога с тысячами jpg заметно
+        # тормозит и файловые менеджеры, и сам getdents. Шарды создаём
+        # заранее одним проходом, а не mkdir на каждый файл.
         run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         out_root = PROJECT_ROOT / "out" / "search_results" / run_ts
-        out_root.mkdir(parents=True, exist_ok=True)
+        for shard in range((len(hits) - 1) // 256 + 1):
+            (out_root / f"{shard:03d}").mkdir(parents=True, exist_ok=True)
 
         object_repo = ObjectPostgresRepository(db)
 
-        # 4. Обработка и сохранение результатов
+        # 4. Загружаем объекты для всех хитов одним запросом
+        # (вместо отдельного SELECT на каждый хит).
+        object_ids = [
+            ObjectId(hit.object_id)
+            for hit in hits
+            if hit.object_id is not None
+        ]
+        objects_by_id = await object_repo.find_by_ids(object_ids)
+
+        # 5. Печатаем список результатов по порядку
         for idx, hit in enumerate(hits, start=1):
             obj_part = f", object_id={hit.object_id}" if hit.object_id is not None else ""
             print(
@@ -75,6 +93,12 @@ async def main() -> None:
                 f"plate={hit.plate_score:.3f}"
             )
 
+        # 6. Сохраняем кадры параллельно: извлечение кадра (ffmpeg/cv2) —
+        # блокирующее I/O, поэтому уводим его в поток и ограничиваем
+        # количество одновременных задач семафором.
+        semaphore = asyncio.Semaphore(_SAVE_CONCURRENCY)
+
+        async def _save_hit_frame(idx: int, hit) -> None:
             score_str = f"{hit.final_score:.3f}".replace(".", "_")
             t_ms = int(round(hit.timestamp_sec * 1000))
 
@@ -88,24 +112,33 @@ async def main() -> None:
                     f"{idx:03d}_{hit.target_type}_t{t_ms:08d}_score{score_str}.jpg"
                 )
 
-            out_path = out_root / filename
+            out_path = out_root / f"{(idx - 1) // 256:03d}" / filename
 
             bbox = None
             if hit.object_id is not None:
-                obj = await object_repo.find_by_id(ObjectId(hit.object_id))
+                obj = objects_by_id.get(str(hit.object_id))
                 if obj is None:
                     print(f"[WARN] object not found in DB: {hit.object_id}")
                 else:
                     bbox = obj.bbox
 
-            try:
-                save_frame_with_optional_bbox(
-                    timestamp_sec=hit.timestamp_sec,
-                    out_path=out_path,
-                    bbox=bbox,
-                )
-            except Exception as exc:
-                print(f"[WARN] failed to save frame for hit #{idx}: {exc}")
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(
+                        save_frame_with_optional_bbox,
+                        timestamp_sec=hit.timestamp_sec,
+                        out_path=out_path,
+                        bbox=bbox,
+                    )
+                except Exception as exc:
+                    print(f"[WARN] failed to save frame for hit #{idx}: {exc}")
+
+        await asyncio.gather(
+            *[
+                _save_hit_frame(idx, hit)
+                for idx, hit in enumerate(hits, start=1)
+            ]
+        )
 
         print(f"\nКадры сохранены в: {out_root}")
 
@@ -1,39 +1,72 @@
 from __future__ import annotations
 
 import asyncio
-from uuid import uuid4
+from typing import Set
 
+from app.config import MAX_CONCURRENT_SEARCH_JOBS
 from app.application.search.search_service import search_by_text
 
 from app.domain.search_job import SearchJob
 from app.domain.value_objects import SearchJobId
 from app.domain.repositories.search_job_repository import SearchJobRepository
 
-from app.infrastructure.db.postgres import PostgresDatabase, load_config_from_env
+from app.infrastructure.db.postgres import PostgresDatabase, get_shared_database
 from app.infrastructure.repositories.search_job_postgres_repository import (
     SearchJobPostgresRepository,
 )
 
 from app.domain.search_job_event import SearchJobEvent
-from app.domain.value_objects import SearchJobResultId, ObjectId
+from app.domain.value_objects import SearchJobResultId, ObjectId, new_uuid
 from app.infrastructure.repositories.search_job_event_postgres_repository import (
     SearchJobEventPostgresRepository,
 )
 
 
-async def _run_job(job_id: SearchJobId) -> None:
-    db = PostgresDatabase(load_config_from_env())
-    await db.connect()
+# Фоновые задачи нужно держать за сильные ссылки: голый
+# asyncio.create_task без ссылки может быть собран GC на полпути,
+# а исключения в нём молча теряются. Семафор ограничивает число
+# одновременных задач (каждая держит соединения пула и гоняет модель).
+_running_jobs: Set[asyncio.Task] = set()
+_job_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCH_JOBS)
+
+
+def spawn_job(job_id: SearchJobId, *, already_claimed: bool = False) -> asyncio.Task:
+    """
+    Запускает _run_job в фоне: с ограничением параллелизма и
+    удержанием ссылки на задачу до её завершения.
+
+    already_claimed=True — вызывающий уже перевёл задачу в RUNNING
+    (воркер делает это через claim_pending), повторный claim не нужен.
+    """
+    async def _guarded() -> None:
+        async with _job_semaphore:
+            await _run_job(job_id, already_claimed=already_claimed)
+
+    task = asyncio.create_task(_guarded())
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    return task
+
+
+async def _run_job(job_id: SearchJobId, *, already_claimed: bool = False) -> None:
+    # Общий пул процесса: не платим за connect на каждую задачу
+    db = await get_shared_database()
 
     job_repo = SearchJobPostgresRepository(db)
     event_repo = SearchJobEventPostgresRepository(db)
 
     try:
+        # Атомарный claim PENDING -> RUNNING: на одну задачу претендуют
+        # два процесса (локальный spawn из create_job и воркер по NOTIFY),
+        # выполнять её должен ровно один. Проигравший молча выходит.
+        if not already_claimed:
+            if not await job_repo.claim_by_id(job_id):
+                return
+
         job = await job_repo.find_by_id(job_id)
         if job is None:
             return
 
-        await job_repo.update_status(job_id, "RUNNING", None)
         await job_repo.update_progress(job_id, 1.0)
 
         # 1. Поиск
@@ -47,22 +80,17 @@ async def _run_job(job_id: SearchJobId) -> None:
 
         await job_repo.update_progress(job_id, 20.0)
 
-        # 2. Сохранение событий поиска
-        events: list[SearchJobEvent] = []
-        for hit in hits:
-            # Ожидается, что hit содержит:
-            #   - hit.track_id: Optional[int]
-            #   - hit.object_id: Optional[UUID / ObjectId-like]
-            #   - hit.final_score: float
-            events.append(
-                SearchJobEvent(
-                    id=SearchJobResultId(uuid4()),
-                    job_id=job_id,
-                    track_id=getattr(hit, "track_id", None),
-                    object_id=ObjectId(hit.object_id) if hit.object_id is not None else None,
-                    score=hit.final_score,
-                )
+        # 2. Сохранение событий поиска (одним COPY в репозитории)
+        events: list[SearchJobEvent] = [
+            SearchJobEvent(
+                id=SearchJobResultId(new_uuid()),
+                job_id=job_id,
+                track_id=hit.track_id,
+                object_id=ObjectId(hit.object_id) if hit.object_id is not None else None,
+                score=hit.final_score,
             )
+            for hit in hits
+        ]
 
         await event_repo.create_many(events)
 
@@ -72,8 +100,6 @@ async def _run_job(job_id: SearchJobId) -> None:
     except Exception as exc:
         await job_repo.update_status(job_id, "FAILED", str(exc))
         raise
-    finally:
-        await db.close()
 
 
 async def create_job(
@@ -91,7 +117,9 @@ async def create_job(
     """
     Регистрирует задачу в БД и запускает воркер в фоне.
     """
-    job_id = SearchJobId(str(uuid4()))
+    # Нативный UUID: asyncpg биндит его в UUID-колонку бинарно,
+    # без парсинга 36-символьной строки на каждой стороне.
+    job_id = SearchJobId(new_uuid())
 
     job = SearchJob(
         id=job_id,
@@ -108,6 +136,12 @@ async def create_job(
     )
     await repo.create(job)
 
-    asyncio.create_task(_run_job(job_id))
+    # Будим подписанных воркеров (LISTEN search_jobs) без их опроса БД.
+    # Локальный spawn ниже остаётся на случай деплоя без воркера:
+    # кто первым сделает claim_by_id/claim_pending, тот и выполняет,
+    # второй претендент выходит без работы.
+    await db.execute("SELECT pg_notify('search_jobs', $1)", str(job_id))
+
+    spawn_job(job_id)
 
     return job_id
\ No newline at end of file
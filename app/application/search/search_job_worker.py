@@ -1,37 +1,65 @@
 from __future__ import annotations
 import asyncio
-import time
 
-from app.infrastructure.db.postgres import PostgresDatabase, load_config_from_env
+from app.infrastructure.db.postgres import get_shared_database
 from app.infrastructure.repositories.search_job_postgres_repository import SearchJobPostgresRepository
-from app.application.search.search_job_runner import _run_job
+from app.application.search.search_job_runner import spawn_job
 
 
 async def main() -> None:
-    db = PostgresDatabase(load_config_from_env())
-    await db.connect()
-
+    """
+    Воркер на LISTEN/NOTIFY вместо опроса таблицы раз в 2 секунды:
+    в установившемся режиме — ноль запросов к БД и суб-секундная
+    задержка старта задачи. create_job шлёт NOTIFY в канал search_jobs
+    с id задачи в payload.
+    """
+    db = await get_shared_database()
     repo = SearchJobPostgresRepository(db)
 
     print("=== Search Job Worker started ===")
 
-    while True:
-        jobs = await repo.find_all()
+    # Сильные ссылки на короткоживущие drain-задачи из нотификаций
+    drain_tasks: set[asyncio.Task] = set()
+
+    async def _drain_pending() -> None:
+        # Забираем задачи по одной атомарно (FOR UPDATE SKIP LOCKED):
+        # при нескольких воркерах каждая задача достаётся ровно одному.
+        while True:
+            job = await repo.claim_pending()
+            if job is None:
+                return
+
+            print(f"[WORKER] start job {job.id}")
+            # claim_pending уже перевёл задачу в RUNNING — повторный
+            # claim внутри _run_job отверг бы собственную задачу
+            spawn_job(job.id, already_claimed=True)
+
+    def _on_job_created(connection, pid, channel, payload) -> None:
+        task = asyncio.create_task(_drain_pending())
+        drain_tasks.add(task)
+        task.add_done_callback(drain_tasks.discard)
 
-        for job in jobs:
-            if job.status == "PENDING":
-                print(f"[WORKER] start job {job.id}")
-                asyncio.create_task(
-                    _run_job(
-                        job_id=job.id,
-                        text_query=job.text_query,
-                        source_id=job.source_id,
-                        start_at=job.start_at,
-                        end_at=job.end_at,
-                    )
-                )
+    async def _listen(connection) -> None:
+        await connection.add_listener("search_jobs", _on_job_created)
+
+        # Дренируем задачи, созданные до подписки (или пока воркер лежал)
+        await _drain_pending()
+
+        # Соединение с подпиской должно жить всё время работы воркера
+        await asyncio.Event().wait()
+
+    await db.with_connection(_listen)
 
-        await asyncio.sleep(2)
 
 if __name__ == "__main__":
+    # uvloop заметно быстрее стандартного event loop на сокетном I/O
+    # (именно им воркер и занят: asyncpg + LISTEN/NOTIFY); если пакет
+    # не установлен — работаем на стандартном цикле.
+    try:
+        import uvloop
+    except ImportError:
+        print("[WARN] uvloop not installed, falling back to asyncio event loop")
+    else:
+        uvloop.install()
+
     asyncio.run(main())
@@ -1,25 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from typing import List, Optional, Literal
-import json
-import math
 
 from app.application.search.query_parser import (
     parse_query,
     ParsedQuery,
     QueryObjectType,
 )
-from app.application.search.color_score import compute_color_score
 from app.application.embeddings.ruclip_embedder import embed_text
 from app.domain.object import ObjectType
 from app.infrastructure.db.postgres import PostgresDatabase
 
 from app.application.video.plate_ocr import normalize_plate_text
 from rapidfuzz import fuzz
+from rapidfuzz.process import cdist
 
+# Минимальная похожесть номеров, ниже которой скор обнуляется
+_MIN_PLATE_SIMILARITY = 0.4
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class SearchHit:
     """
     Результат поиска.
@@ -56,40 +58,6 @@ class SearchHit:
     track_id: Optional[int]
 
 
-def _filter_hits(
-    hits: List[SearchHit],
-    query_has_color: bool,
-    query_has_plate: bool,
-    clip_min: float,
-    final_min: float,
-) -> List[SearchHit]:
-    """
-    Фильтрация результатов по:
-      - clip_score >= clip_min (всегда),
-      - если в запросе был цвет — требуем color_score > 0,
-      - если в запросе был номер — требуем plate_score > 0,
-      - final_score >= final_min.
-    """
-    filtered: List[SearchHit] = []
-
-    for hit in hits:
-        if hit.clip_score < clip_min:
-            continue
-
-        if query_has_color and hit.color_score <= 0.0:
-            continue
-
-        if query_has_plate and hit.plate_score <= 0.0:
-            continue
-
-        if hit.final_score < final_min:
-            continue
-
-        filtered.append(hit)
-
-    return filtered
-
-
 async def search_by_text(
     db: PostgresDatabase,
     source_id: str,
@@ -114,9 +82,10 @@ async def search_by_text(
         * clip_score >= clip_min_pure (всегда),
         * если в запросе был цвет — требуем color_score > 0,
         * если в запросе был номер — требуем plate_score > 0,
-        * final_score >= final_min (адаптивно),
-    - Если после фильтрации пусто, понижает final_min ступенчато на 0.1,
-      пока не появятся какие-то результаты, и их возвращает.
+        * final_score >= final_min,
+    - Если порог final_min никто не прошёл — возвращает top-5
+      прошедших остальные фильтры по final_score; если фильтры
+      не прошёл никто — top-5 всех хитов по clip_score.
     """
 
     parsed = parse_query(text)
@@ -128,59 +97,59 @@ async def search_by_text(
     )
     query_has_plate = parsed.plate is not None
 
-    query_vector = embed_text(parsed.cleaned_text)
+    # Прогон текста через ruCLIP — десятки миллисекунд чистого CPU;
+    # уводим его в поток, чтобы не замораживать event loop (кэш
+    # эмбеддера при повторном запросе отрабатывает так же быстро).
+    query_vector = await asyncio.to_thread(embed_text, parsed.cleaned_text)
 
+    # Скоринг и жёсткие фильтры (clip/цвет/номер) — за один проход:
+    # SearchHit аллоцируется только для выживших кандидатов.
     if parsed.type is None:
-        candidates = await _fetch_frame_candidates(
+        frame_candidates = await _fetch_frame_candidates(
             db=db,
             source_id=source_id,
             start_at=start_at,
             end_at=end_at,
             max_candidates=max_candidates,
+            query_vector=query_vector,
         )
-        hits = _score_frames(parsed, query_vector, candidates)
+        hits = _score_frames(
+            parsed,
+            frame_candidates,
+            clip_min=clip_min_pure,
+            query_has_color=query_has_color,
+            query_has_plate=query_has_plate,
+        )
+        if not hits:
+            return _fallback_frame_hits(frame_candidates)
     else:
-        candidates = await _fetch_object_candidates(
+        object_candidates = await _fetch_object_candidates(
             db=db,
             source_id=source_id,
             start_at=start_at,
             end_at=end_at,
             query_type=parsed.type,
             max_candidates=max_candidates,
+            parsed=parsed,
+            query_vector=query_vector,
         )
-        hits = _score_objects(parsed, query_vector, candidates)
-
-    filtered = _filter_hits(
-        hits=hits,
-        query_has_color=query_has_color,
-        query_has_plate=query_has_plate,
-        clip_min=clip_min_pure,
-        final_min=final_min,
-    )
-
-    if filtered:
-        filtered.sort(key=lambda h: h.final_score, reverse=True)
-        return filtered
-
-    current_final_min = final_min - 0.10
-    while current_final_min >= 0.0:
-        filtered = _filter_hits(
-            hits=hits,
+        hits = _score_objects(
+            parsed,
+            object_candidates,
+            clip_min=clip_min_pure,
             query_has_color=query_has_color,
             query_has_plate=query_has_plate,
-            clip_min=clip_min_pure,
-            final_min=current_final_min,
         )
-        if filtered:
-            filtered.sort(key=lambda h: h.final_score, reverse=True)
-            return filtered
-
-        current_final_min -= 0.10
+        if not hits:
+            return _fallback_object_hits(parsed, object_candidates)
 
-    if not hits:
-        return []
+    top = [h for h in hits if h.final_score >= max(final_min, 0.0)]
+    if top:
+        top.sort(key=lambda h: h.final_score, reverse=True)
+        return top
 
-    hits.sort(key=lambda h: h.clip_score, reverse=True)
+    # Порог не прошёл никто — отдаём лучших из прошедших фильтры
+    hits.sort(key=lambda h: h.final_score, reverse=True)
     return hits[:5]
 
 
@@ -192,7 +161,7 @@ async def search_by_text(
 class _FrameCandidate:
     frame_id: str
     timestamp_sec: float
-    vector: List[float]
+    clip_score: float
 
 
 async def _fetch_frame_candidates(
@@ -201,62 +170,73 @@ async def _fetch_frame_candidates(
     start_at: str,
     end_at: str,
     max_candidates: int,
+    query_vector: List[float],
 ) -> List[_FrameCandidate]:
     """
     Загружает кандидатов для поиска по кадрам:
     только кадры указанного source_id и в окне [start_at, end_at].
+
+    Ранжирование делает Postgres: ORDER BY по косинусной дистанции
+    pgvector (<=>) с HNSW-индексом, наружу возвращаются только top-K
+    строк с уже посчитанным clip_score — сами векторы (512 float на
+    кандидата) по сети больше не гоняются.
     """
     sql = """
     SELECT
-        e.id,
         e.frame_id,
-        e.vector,
-        f.timestamp_sec
+        f.timestamp_sec,
+        1 - (e.vector <=> $5::halfvec) AS clip_score
     FROM embeddings e
     JOIN frames f ON e.frame_id = f.id
     WHERE e.entity_type = 'FRAME'
       AND f.source_id = $1
       AND f.at >= $2
       AND f.at <= $3
-    ORDER BY f.timestamp_sec
+    ORDER BY e.vector <=> $5::halfvec
     LIMIT $4;
     """
 
-    rows = await db.fetch(sql, source_id, start_at, end_at, max_candidates)
-
-    candidates: List[_FrameCandidate] = []
-    for row in rows:
-        vec = _parse_vector(row["vector"])
-        if vec is None:
-            continue
+    rows = await db.fetch(
+        sql,
+        source_id,
+        start_at,
+        end_at,
+        max_candidates,
+        _vector_to_literal(query_vector),
+    )
 
-        candidates.append(
-            _FrameCandidate(
-                frame_id=str(row["frame_id"]),
-                timestamp_sec=float(row["timestamp_sec"]),
-                vector=vec,
-            )
+    return [
+        _FrameCandidate(
+            frame_id=str(row["frame_id"]),
+            timestamp_sec=float(row["timestamp_sec"]),
+            clip_score=float(row["clip_score"]),
         )
-
-    return candidates
+        for row in rows
+    ]
 
 
 def _score_frames(
     parsed: ParsedQuery,  # noqa: ARG001
-    query_vector: List[float],
     candidates: List[_FrameCandidate],
+    *,
+    clip_min: float,
+    query_has_color: bool,
+    query_has_plate: bool,
 ) -> List[SearchHit]:
     """
-    Для поиска по кадрам учитываем только clip_score.
-    Цвет/номер относятся к объектам, здесь 0.
+    Для поиска по кадрам учитываем только clip_score: цвет/номер
+    относятся к объектам, поэтому при их наличии в запросе ни один
+    кадр жёсткие фильтры не проходит.
     """
+    if query_has_color or query_has_plate:
+        return []
+
     hits: List[SearchHit] = []
 
     for cand in candidates:
-        clip = _cosine_similarity(query_vector, cand.vector)
-        color = 0.0
-        plate = 0.0
-        final = _combine_scores(clip, color, plate)
+        clip = cand.clip_score
+        if clip < clip_min:
+            continue
 
         hits.append(
             SearchHit(
@@ -264,10 +244,10 @@ def _score_frames(
                 frame_id=cand.frame_id,
                 object_id=None,
                 timestamp_sec=cand.timestamp_sec,
-                final_score=final,
+                final_score=clip,  # цвет/номер нулевые, w_clip = 1
                 clip_score=clip,
-                color_score=color,
-                plate_score=plate,
+                color_score=0.0,
+                plate_score=0.0,
                 track_id=None,  # для кадров трека нет
             )
         )
@@ -275,6 +255,28 @@ def _score_frames(
     return hits
 
 
+def _fallback_frame_hits(candidates: List[_FrameCandidate]) -> List[SearchHit]:
+    """
+    Фильтры не прошёл никто — top-5 кадров по clip_score.
+    """
+    best = sorted(candidates, key=lambda c: c.clip_score, reverse=True)[:5]
+
+    return [
+        SearchHit(
+            target_type="frame",
+            frame_id=cand.frame_id,
+            object_id=None,
+            timestamp_sec=cand.timestamp_sec,
+            final_score=cand.clip_score,
+            clip_score=cand.clip_score,
+            color_score=0.0,
+            plate_score=0.0,
+            track_id=None,
+        )
+        for cand in best
+    ]
+
+
 # =========================
 #   Поиск по объектам
 # =========================
@@ -286,12 +288,15 @@ class _ObjectCandidate:
     timestamp_sec: float
     object_type: ObjectType
     track_id: Optional[int]          # NEW
-    vector: List[float]
+    clip_score: float
 
-    transport_color_hsv: Optional[str]
+    # Цветовые скоры считает Postgres (color_score, миграции 019/023)
+    # прямо в выборке кандидатов; None — если цвет в запросе не задан
+    # или у объекта нет соответствующего HSV-атрибута.
+    transport_color_score: Optional[float]
     transport_plate: Optional[str]
-    person_upper_hsv: Optional[str]
-    person_lower_hsv: Optional[str]
+    person_upper_score: Optional[float]
+    person_lower_score: Optional[float]
 
 
 async def _fetch_object_candidates(
@@ -301,23 +306,33 @@ async def _fetch_object_candidates(
     end_at: str,
     query_type: QueryObjectType,
     max_candidates: int,
+    parsed: ParsedQuery,
+    query_vector: List[float],
 ) -> List[_ObjectCandidate]:
     """
     Загружает кандидатов для поиска по объектам:
     только объекты, чьи кадры принадлежат source_id и лежат в [start_at, end_at].
+
+    Ранжирование и скоринг делает Postgres: clip_score — косинусная
+    близость pgvector (<=>, HNSW-индекс), цветовые скоры —
+    color_score по числовым HSV-колонкам (без разбора строк).
+    Наружу приходят только top-K строк без векторов.
     """
     sql = """
     SELECT
         e.object_id,
-        e.vector,
         o.type AS object_type,
         o.frame_id,
         o.track_id,
         f.timestamp_sec,
-        ta.color_hsv,
+        1 - (e.vector <=> $9::halfvec) AS clip_score,
+        color_score($6::text, ta.color_h, ta.color_s, ta.color_v)
+            AS transport_color_score,
         ta.license_plate,
-        pa.upper_color_hsv,
-        pa.lower_color_hsv
+        color_score($7::text, pa.upper_color_h, pa.upper_color_s, pa.upper_color_v)
+            AS person_upper_score,
+        color_score($8::text, pa.lower_color_h, pa.lower_color_s, pa.lower_color_v)
+            AS person_lower_score
     FROM embeddings e
     JOIN objects o ON e.object_id = o.id
     JOIN frames f ON o.frame_id = f.id
@@ -331,7 +346,7 @@ async def _fetch_object_candidates(
           $4::text IS NULL
           OR o.type::text = $4::text
       )
-    ORDER BY f.timestamp_sec
+    ORDER BY e.vector <=> $9::halfvec
     LIMIT $5;
     """
 
@@ -344,45 +359,96 @@ async def _fetch_object_candidates(
         end_at,
         type_filter,
         max_candidates,
+        parsed.color,
+        parsed.upper_color,
+        parsed.lower_color,
+        _vector_to_literal(query_vector),
     )
 
-    candidates: List[_ObjectCandidate] = []
+    return [
+        _ObjectCandidate(
+            object_id=str(row["object_id"]),
+            frame_id=str(row["frame_id"]),
+            timestamp_sec=float(row["timestamp_sec"]),
+            object_type=ObjectType(row["object_type"]),
+            track_id=row["track_id"],  # может быть None или int
+            clip_score=float(row["clip_score"]),
+            transport_color_score=row["transport_color_score"],
+            transport_plate=row["license_plate"],
+            person_upper_score=row["person_upper_score"],
+            person_lower_score=row["person_lower_score"],
+        )
+        for row in rows
+    ]
+
 
-    for row in rows:
-        vec = _parse_vector(row["vector"])
-        if vec is None:
+def _score_objects(
+    parsed: ParsedQuery,
+    candidates: List[_ObjectCandidate],
+    *,
+    clip_min: float,
+    query_has_color: bool,
+    query_has_plate: bool,
+) -> List[SearchHit]:
+    """
+    Скоринг и жёсткие фильтры за один проход: для кандидатов,
+    не прошедших clip/цвет/номер, SearchHit не аллоцируется,
+    а цветовой скор ниже clip-порога вообще не считается.
+    """
+    hits: List[SearchHit] = []
+    plate_scores = _compute_plate_scores(parsed.plate, candidates)
+
+    # Жёсткие фильтры гарантируют выжившим color > 0 при цвете в запросе
+    # и plate > 0 при номере, поэтому веса одни на весь список —
+    # ветвление по наличию скоров на каждый хит не нужно.
+    w_clip, w_color, w_plate = _weights_for(query_has_color, query_has_plate)
+
+    for cand, plate in zip(candidates, plate_scores):
+        clip = cand.clip_score
+        if clip < clip_min:
+            continue
+        if query_has_plate and plate <= 0.0:
+            continue
+
+        color = _compute_object_color_score(parsed, cand)
+        if query_has_color and color <= 0.0:
             continue
 
-        candidates.append(
-            _ObjectCandidate(
-                object_id=str(row["object_id"]),
-                frame_id=str(row["frame_id"]),
-                timestamp_sec=float(row["timestamp_sec"]),
-                object_type=ObjectType(row["object_type"]),
-                track_id=row["track_id"],  # может быть None или int
-                vector=vec,
-                transport_color_hsv=row["color_hsv"],
-                transport_plate=row["license_plate"],
-                person_upper_hsv=row["upper_color_hsv"],
-                person_lower_hsv=row["lower_color_hsv"],
+        hits.append(
+            SearchHit(
+                target_type="object",
+                frame_id=cand.frame_id,
+                object_id=cand.object_id,
+                timestamp_sec=cand.timestamp_sec,
+                final_score=w_clip * clip + w_color * color + w_plate * plate,
+                clip_score=clip,
+                color_score=color,
+                plate_score=plate,
+                track_id=cand.track_id,  # ВАЖНО: прокидываем трек
             )
         )
 
-    return candidates
+    return hits
 
 
-def _score_objects(
+def _fallback_object_hits(
     parsed: ParsedQuery,
-    query_vector: List[float],
     candidates: List[_ObjectCandidate],
 ) -> List[SearchHit]:
-    hits: List[SearchHit] = []
+    """
+    Фильтры не прошёл никто — top-5 объектов по clip_score,
+    цвет/номер досчитываются только для этой пятёрки.
+    """
+    best = sorted(candidates, key=lambda c: c.clip_score, reverse=True)[:5]
+    plate_scores = _compute_plate_scores(parsed.plate, best)
 
-    for cand in candidates:
-        clip = _cosine_similarity(query_vector, cand.vector)
+    hits: List[SearchHit] = []
+    for cand, plate in zip(best, plate_scores):
         color = _compute_object_color_score(parsed, cand)
-        plate = _compute_plate_score(parsed.plate, cand.transport_plate)
-        final = _combine_scores(clip, color, plate)
+
+        # В fallback скоры могут быть нулевыми даже при цвете/номере
+        # в запросе — веса остаются по-хитовыми.
+        w_clip, w_color, w_plate = _weights_for(color > 0.0, plate > 0.0)
 
         hits.append(
             SearchHit(
@@ -390,11 +456,11 @@ def _score_objects(
                 frame_id=cand.frame_id,
                 object_id=cand.object_id,
                 timestamp_sec=cand.timestamp_sec,
-                final_score=final,
-                clip_score=clip,
+                final_score=w_clip * cand.clip_score + w_color * color + w_plate * plate,
+                clip_score=cand.clip_score,
                 color_score=color,
                 plate_score=plate,
-                track_id=cand.track_id,  # ВАЖНО: прокидываем трек
+                track_id=cand.track_id,
             )
         )
 
@@ -402,39 +468,25 @@ def _score_objects(
 
 
 def _compute_object_color_score(
-    parsed: ParsedQuery,
+    parsed: ParsedQuery,  # noqa: ARG001
     cand: _ObjectCandidate,
 ) -> float:
     """
-    Цветовой скор:
-    - TRANSPORT: parsed.color + transport_color_hsv.
-    - PERSON: upper_color / lower_color + соответствующие HSV.
+    Цветовой скор (сами значения уже посчитаны на стороне Postgres):
+    - TRANSPORT: transport_color_score.
+    - PERSON: среднее по имеющимся upper/lower скорам.
     """
     if cand.object_type == ObjectType.TRANSPORT:
-        if not parsed.color:
-            return 0.0
-
-        hsv = _parse_hsv(cand.transport_color_hsv)
-        if hsv is None:
+        if cand.transport_color_score is None:
             return 0.0
-
-        h, s, v = hsv
-        return compute_color_score(parsed.color, h, s, v)
+        return float(cand.transport_color_score)
 
     if cand.object_type == ObjectType.PERSON:
-        scores: List[float] = []
-
-        if parsed.upper_color and cand.person_upper_hsv:
-            hsv_upper = _parse_hsv(cand.person_upper_hsv)
-            if hsv_upper is not None:
-                hu, su, vu = hsv_upper
-                scores.append(compute_color_score(parsed.upper_color, hu, su, vu))
-
-        if parsed.lower_color and cand.person_lower_hsv:
-            hsv_lower = _parse_hsv(cand.person_lower_hsv)
-            if hsv_lower is not None:
-                hl, sl, vl = hsv_lower
-                scores.append(compute_color_score(parsed.lower_color, hl, sl, vl))
+        scores = [
+            float(score)
+            for score in (cand.person_upper_score, cand.person_lower_score)
+            if score is not None
+        ]
 
         if not scores:
             return 0.0
@@ -444,103 +496,64 @@ def _compute_object_color_score(
     return 0.0
 
 
-def _compute_plate_score(
+def _compute_plate_scores(
     query_plate: Optional[str],
-    db_plate: Optional[str],
-) -> float:
+    candidates: List[_ObjectCandidate],
+) -> List[float]:
     """
-    plate_score:
+    plate_score для всех кандидатов разом:
       - 1.0 при точном совпадении нормализованных номеров,
-      - в остальных случаях — плавный скор по rapidfuzz (0.0..1.0).
+      - в остальных случаях — плавный скор по rapidfuzz (0.0..1.0),
+      - ниже _MIN_PLATE_SIMILARITY — обнуляется.
+
+    Номер запроса нормализуется один раз (а не на каждого кандидата),
+    а fuzz.ratio по всем номерам БД считает одна матричная cdist
+    (SIMD + многопоточность rapidfuzz) вместо вызова на строку.
     """
-    if not query_plate or not db_plate:
-        return 0.0
+    if not query_plate or not candidates:
+        return [0.0] * len(candidates)
 
     q_norm = normalize_plate_text(query_plate)
-    db_norm = normalize_plate_text(db_plate)
-
-    if not q_norm or not db_norm:
-        return 0.0
+    if not q_norm:
+        return [0.0] * len(candidates)
 
-    if q_norm == db_norm:
-        return 1.0
+    db_norms = [
+        normalize_plate_text(cand.transport_plate) if cand.transport_plate else ""
+        for cand in candidates
+    ]
+    if not any(db_norms):
+        return [0.0] * len(candidates)
 
-    score = fuzz.ratio(q_norm, db_norm) / 100.0
+    raw_scores = cdist([q_norm], db_norms, scorer=fuzz.ratio, workers=-1)[0]
 
-    MIN_PLATE_SIMILARITY = 0.4
-    if score < MIN_PLATE_SIMILARITY:
-        return 0.0
+    scores: List[float] = []
+    for db_norm, raw in zip(db_norms, raw_scores):
+        if not db_norm:
+            scores.append(0.0)
+        elif db_norm == q_norm:
+            scores.append(1.0)
+        else:
+            score = float(raw) / 100.0
+            scores.append(score if score >= _MIN_PLATE_SIMILARITY else 0.0)
 
-    return score
+    return scores
 
 
 # =========================
 #   Вспомогательные
 # =========================
 
-def _parse_vector(raw: object) -> Optional[List[float]]:
+def _vector_to_literal(values: List[float]) -> str:
     """
-    Разбор вектора из TEXT/JSON в Python-список.
+    Список чисел -> литерал pgvector: [0.1, 0.2] -> "[0.1,0.2]".
     """
-    if raw is None:
-        return None
+    inner = ",".join(str(v) for v in values)
+    return f"[{inner}]"
 
-    if isinstance(raw, list):
-        return [float(x) for x in raw]
 
-    if isinstance(raw, str):
-        try:
-            data = json.loads(raw)
-            return [float(x) for x in data]
-        except Exception:
-            return None
-
-    return None
-
-
-def _parse_hsv(hsv_str: Optional[str]) -> Optional[tuple[float, float, float]]:
-    """
-    Разбор строки формата "h,s,v" -> (h, s, v).
+def _weights_for(has_color: bool, has_plate: bool) -> tuple[float, float, float]:
     """
-    if not hsv_str:
-        return None
-
-    try:
-        h_str, s_str, v_str = hsv_str.split(",")
-        return float(h_str), float(s_str), float(v_str)
-    except Exception:
-        return None
-
-
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-    """
-    Косинусная близость между двумя векторами.
-    """
-    if len(a) != len(b):
-        raise ValueError("Vectors must have the same length")
-
-    dot = 0.0
-    na = 0.0
-    nb = 0.0
-
-    for x, y in zip(a, b):
-        dot += x * y
-        na += x * x
-        nb += y * y
-
-    if na == 0.0 or nb == 0.0:
-        return 0.0
-
-    return dot / math.sqrt(na * nb)
-
-
-def _combine_scores(
-    clip_score: float,
-    color_score: float,
-    plate_score: float,
-) -> float:
-    """
-    Динамическое комбинирование скорингов:
+    Веса комбинирования скорингов (clip, color, plate):
 
     - Если нет ни цвета, ни номера:
         final = clip.
@@ -551,20 +564,10 @@ def _combine_scores(
     - Если есть и цвет, и номер:
         clip ~ 0.4, color ~ 0.2, plate ~ 0.4.
     """
-    has_color = color_score > 0.0
-    has_plate = plate_score > 0.0
-
     if not has_color and not has_plate:
-        w_clip, w_color, w_plate = 1.0, 0.0, 0.0
-    elif has_color and not has_plate:
-        w_clip, w_color, w_plate = 0.6, 0.4, 0.0
-    elif has_plate and not has_color:
-        w_clip, w_color, w_plate = 0.4, 0.0, 0.6
-    else:
-        w_clip, w_color, w_plate = 0.4, 0.2, 0.4
-
-    return (
-        w_clip * clip_score
-        + w_color * color_score
-        + w_plate * plate_score
-    )
\ No newline at end of file
+        return 1.0, 0.0, 0.0
+    if has_color and not has_plate:
+        return 0.6, 0.4, 0.0
+    if has_plate and not has_color:
+        return 0.4, 0.0, 0.6
+    return 0.4, 0.2, 0.4
\ No newline at end of file
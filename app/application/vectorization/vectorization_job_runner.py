@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import Dict, List
 from uuid import uuid4
 
@@ -10,7 +11,7 @@ from app.domain.repositories.vectorization_job_repository import (
     VectorizationJobRepository,
 )
 
-from app.infrastructure.db.postgres import PostgresDatabase, load_config_from_env
+from app.infrastructure.db.postgres import get_shared_database
 from app.infrastructure.repositories.vectorization_job_postgres_repository import (
     VectorizationJobPostgresRepository,
 )
@@ -24,8 +25,8 @@ async def _run_vectorization_job(job_id: VectorizationJobId) -> None:
     """
     Внутренний воркер для выполнения задачи векторизации.
     """
-    db = PostgresDatabase(load_config_from_env())
-    await db.connect()
+    # Общий пул процесса: не платим за connect на каждую задачу
+    db = await get_shared_database()
 
     repo = VectorizationJobPostgresRepository(db)
 
@@ -37,12 +38,28 @@ async def _run_vectorization_job(job_id: VectorizationJobId) -> None:
         await repo.update_status(job_id, "RUNNING", None)
         await repo.update_progress(job_id, 1.0)
 
+        last_emit_ts = 0.0
+        last_emit_pct = 0.0
+
         async def _progress_cb(frac: float) -> None:
             """
             frac: 0.0 .. 1.0 от process_video.
             Маппим в 10..100 для задачи (1% уже поставлен перед запуском).
+
+            UPDATE в БД — полный round-trip, а колбэк дёргается на каждый
+            кадр; дебаунсим до ~1 записи в секунду либо шага >= 1%.
+            Финальные 100% дожимаются после usecase безусловно.
             """
+            nonlocal last_emit_ts, last_emit_pct
+
             progress = 10.0 + 90.0 * max(0.0, min(1.0, frac))
+
+            now = time.monotonic()
+            if now - last_emit_ts < 1.0 and progress - last_emit_pct < 1.0:
+                return
+
+            last_emit_ts = now
+            last_emit_pct = progress
             await repo.update_progress(job_id, progress)
 
         # Запускаем usecase с прогресс-колбэком:
@@ -61,8 +78,6 @@ async def _run_vectorization_job(job_id: VectorizationJobId) -> None:
     except Exception as exc:
         await repo.update_status(job_id, "FAILED", str(exc))
         raise
-    finally:
-        await db.close()
 
 
 async def create_vectorization_job(
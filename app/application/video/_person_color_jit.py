@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import numba
+import numpy as np
+
+# LUT синусов/косинусов по hue: OpenCV-канал принимает всего 180
+# значений (шаг 2°) — две выборки из таблиц по 180 элементов вместо
+# sin/cos на каждый пиксель окна.
+_HUE_SIN = np.sin(np.deg2rad(np.arange(180) * 2.0))
+_HUE_COS = np.cos(np.deg2rad(np.arange(180) * 2.0))
+
+
+@numba.njit(cache=True, fastmath=True)
+def region_profile(
+    h: np.ndarray,
+    s: np.ndarray,
+    v: np.ndarray,
+    v_min: int,
+    s_chroma: int,
+):
+    """
+    Слитое ядро цветового профиля зоны одежды: вместо ~8 отдельных
+    NumPy-проходов (astype, маски, медианы, гистограмма, sin/cos)
+    обходит uint8-каналы HSV ровно два раза и накапливает всё сразу.
+
+    Первый проход — по валидным пикселям (v > v_min): счётчик,
+    гистограммы h (180 бинов, для ахроматической медианы) и s/v
+    (по 256 бинов), плюс 72-биновая гистограмма hue по хроматическим
+    пикселям (s > s_chroma). Второй проход — по окну +/- 3 бина (15°)
+    вокруг доминирующего hue-бина: суммы sin/cos для окружного
+    среднего и 256-биновые гистограммы S/V окна.
+
+    Медианы по гистограммам считает вызывающая сторона сканом CDF —
+    сами значения пикселей никуда не выписываются.
+
+    Возвращает (valid_count, chroma_count, sin_sum, cos_sum, win_count,
+    h_hist_valid, s_hist_valid, v_hist_valid, s_win_hist, v_win_hist).
+    """
+    rows, cols = h.shape
+
+    h_hist_valid = np.zeros(180, dtype=np.int64)
+    s_hist_valid = np.zeros(256, dtype=np.int64)
+    v_hist_valid = np.zeros(256, dtype=np.int64)
+    hue_hist = np.zeros(72, dtype=np.int64)
+
+    valid_count = 0
+    chroma_count = 0
+
+    for i in range(rows):
+        for j in range(cols):
+            if v[i, j] > v_min:
+                valid_count += 1
+                h_hist_valid[h[i, j]] += 1
+                s_hist_valid[s[i, j]] += 1
+                v_hist_valid[v[i, j]] += 1
+                if s[i, j] > s_chroma:
+                    chroma_count += 1
+                    hue_hist[(np.int64(h[i, j]) * 72) // 180] += 1
+
+    s_win_hist = np.zeros(256, dtype=np.int64)
+    v_win_hist = np.zeros(256, dtype=np.int64)
+    sin_sum = 0.0
+    cos_sum = 0.0
+    win_count = 0
+
+    if chroma_count > 0:
+        max_bin = 0
+        for b in range(72):
+            if hue_hist[b] > hue_hist[max_bin]:
+                max_bin = b
+
+        # Окно +/- 3 бина вокруг доминирующего, с учётом цикличности
+        # hue — LUT принадлежности по номеру бина вместо двух
+        # float-сравнений с ветвлением на перенос через 0°.
+        allowed = np.zeros(72, dtype=np.bool_)
+        for d in range(-3, 4):
+            allowed[(max_bin + d) % 72] = True
+
+        for i in range(rows):
+            for j in range(cols):
+                if v[i, j] > v_min and s[i, j] > s_chroma:
+                    if allowed[(np.int64(h[i, j]) * 72) // 180]:
+                        sin_sum += _HUE_SIN[h[i, j]]
+                        cos_sum += _HUE_COS[h[i, j]]
+                        s_win_hist[s[i, j]] += 1
+                        v_win_hist[v[i, j]] += 1
+                        win_count += 1
+
+    return (
+        valid_count,
+        chroma_count,
+        sin_sum,
+        cos_sum,
+        win_count,
+        h_hist_valid,
+        s_hist_valid,
+        v_hist_valid,
+        s_win_hist,
+        v_win_hist,
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 from typing import Optional
 
@@ -7,6 +8,22 @@ import cv2
 import numpy as np
 from PIL import Image
 
+from app.application.video import _car_color_jit
+
+# Пороги в uint8-шкале OpenCV (S/V в [0;255]): сравниваем сырые каналы
+# без up-cast'а в float32 — ядро упирается в память, и отказ от трёх
+# полноразмерных float-копий сокращает трафик в 4 раза.
+# v > 25 <=> v_norm > 0.1; s > 89 <=> s_norm > 0.35 (точно, т.к. каналы целые).
+_V_MIN_U8 = int(0.1 * 255)
+_S_CHROMA_U8 = int(0.35 * 255)
+
+# Кропы меньше этой площади обрабатываем как есть: фокус-кроп и resize
+# на таких размерах дороже самой HSV-статистики
+_SMALL_CROP_AREA = 80 * 80
+
+# Перевод Hue из шкалы Pillow (0..255) в шкалу OpenCV (0..179)
+_PIL2CV_H = ((np.arange(256) * 180) // 256).astype(np.uint8)
+
 
 @dataclass(frozen=True)
 class CarColorProfile:
@@ -51,11 +68,14 @@ def _focus_on_car_body(bgr: np.ndarray) -> np.ndarray:
     if y2 <= y1 or x2 <= x1:
         return bgr
 
-    return bgr[y1:y2, x1:x2].copy()
+    # View без копии: cv2.resize/pyrDown/cvtColor ниже по цепочке
+    # нормально работают со страйдовыми срезами, memcpy кропа не нужен
+    return bgr[y1:y2, x1:x2]
 
 def extract_car_hsv_profile(
     image: Image.Image | np.ndarray,
     min_valid_fraction: float = 0.05,
+    hsv_crop: Optional[np.ndarray] = None,
 ) -> Optional[CarColorProfile]:
     """
     Оценка цвета автомобиля по кропу.
@@ -81,54 +101,65 @@ def extract_car_hsv_profile(
     :param image: кроп автомобиля (PIL.Image или BGR/GRAY np.ndarray)
     :param min_valid_fraction: минимальная доля валидных пикселей (0..1),
                                чтобы считать оценку осмысленной
+    :param hsv_crop: уже посчитанный HSV того же кропа (обычно view из
+                     полнокадрового cvtColor); используется без повторной
+                     конвертации, если по размерам не требуется resize
     :return: CarColorProfile или None, если данных недостаточно
     """
-    bgr = _to_bgr(image)
-
-    # Сначала грубо отсекаем фон и небо, фокусируемся на кузове
-    bgr = _focus_on_car_body(bgr)
+    if isinstance(image, Image.Image):
+        # PIL-вход конвертируется в HSV без промежуточного BGR
+        hsv = _pil_to_hsv(image)
+    else:
+        hsv = _usable_hsv_view(hsv_crop) if hsv_crop is not None else None
 
-    # Нормализация размера, чтобы кроп не был ни слишком мелким, ни огромным
-    bgr = _resize_reasonable(bgr, target_area=160 * 160)
+        if hsv is None:
+            bgr = _to_bgr(image)
 
-    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+            # Крошечные кропы обрабатываем как есть: фокус-кроп срезал бы
+            # ещё четверть и без того бедного сигнала, resize — no-op, а обе
+            # операции на таких размерах дороже самой HSV-статистики.
+            if bgr.shape[0] * bgr.shape[1] >= _SMALL_CROP_AREA:
+                # Сначала грубо отсекаем фон и небо, фокусируемся на кузове
+                bgr = _focus_on_car_body(bgr)
 
-    h_cv = hsv[:, :, 0].astype(np.float32)  # [0; 179]
-    s_cv = hsv[:, :, 1].astype(np.float32)  # [0; 255]
-    v_cv = hsv[:, :, 2].astype(np.float32)  # [0; 255]
+                # Нормализация размера, чтобы кроп не был ни слишком мелким,
+                # ни огромным
+                bgr = _resize_reasonable(bgr, target_area=160 * 160)
 
-    # Переводим в "нормальный" HSV формат:
-    h_deg = h_cv * 2.0                  # [0; 360]
-    s_norm = s_cv / 255.0               # [0; 1]
-    v_norm = v_cv / 255.0               # [0; 1]
+            hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
 
     # Маска валидных пикселей (не совсем чёрный мусор)
-    valid_mask = v_norm > 0.1
-    if not np.any(valid_mask):
+    valid_mask_u8 = (hsv[:, :, 2] > _V_MIN_U8).view(np.uint8)
+
+    # Гистограмма S по валидным пикселям (SIMD-C внутри calcHist):
+    # из неё берём и количество валидных пикселей, и медианную
+    # насыщенность, и число хроматических — масочные выборки значений
+    # не материализуются вовсе.
+    s_hist_valid = _masked_hist(hsv, channel=1, mask_u8=valid_mask_u8, bins=256)
+
+    total_pixels = hsv.shape[0] * hsv.shape[1]
+    valid_count = int(s_hist_valid.sum())
+    if valid_count == 0:
         return None
 
-    total_pixels = h_deg.size
-    valid_count = int(valid_mask.sum())
     if valid_count / float(total_pixels) < min_valid_fraction:
         return None
 
-    # Хроматические пиксели: достаточно насыщенный цвет
-    s_all = s_norm[valid_mask]
-    median_s_all = float(np.median(s_all))
+    # Медианная насыщенность по валидным пикселям (uint8-шкала)
+    median_s_all = _median_from_hist(s_hist_valid)
 
-    # Кандидаты в хроматические пиксели: достаточно насыщенные
-    chroma_mask = valid_mask & (s_norm > 0.35)
-    chroma_count = int(chroma_mask.sum())
+    # Хроматические пиксели (s > порога) — хвост той же гистограммы
+    chroma_count = int(s_hist_valid[_S_CHROMA_U8 + 1:].sum())
     chroma_fraction = chroma_count / float(total_pixels)
 
     # Машину считаем хроматической, только если:
     #   - много реально насыщенных пикселей (>= 10%)
     #   - и в среднем насыщенность не маленькая (median_s > 0.25)
-    if chroma_count > 0 and chroma_fraction >= 0.10 and median_s_all > 0.25:
-        return _compute_chromatic_profile(h_deg, s_norm, v_norm, chroma_mask)
+    if chroma_count > 0 and chroma_fraction >= 0.10 and median_s_all > 0.25 * 255.0:
+        return _compute_chromatic_profile(hsv)
 
     # Иначе — ахроматический объект (white/gray/black)
-    return _compute_achromatic_profile(h_deg, s_norm, v_norm, valid_mask)
+    return _compute_achromatic_profile(hsv, valid_mask_u8)
 
 
 # ==========================
@@ -136,6 +167,99 @@ def extract_car_hsv_profile(
 # ==========================
 
 
+def _usable_hsv_view(hsv_crop: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Возвращает view готового HSV-кропа, если статистику можно считать
+    без resize (зеркалит логику размеров BGR-ветки). Иначе None:
+    интерполяция канала Hue ломает кольцевую шкалу на стыке 179/0,
+    поэтому при необходимости масштабирования конвертируем из BGR заново.
+    """
+    if hsv_crop.ndim != 3 or hsv_crop.shape[2] != 3:
+        return None
+
+    h, w = hsv_crop.shape[:2]
+    if h * w < _SMALL_CROP_AREA:
+        return hsv_crop
+
+    focused = _focus_on_car_body(hsv_crop)
+    fh, fw = focused.shape[:2]
+    if fh * fw == 0:
+        return None
+
+    scale = (160 * 160 / float(fh * fw)) ** 0.5
+    if 0.7 < scale < 1.4:
+        return focused
+
+    return None
+
+
+def _masked_hist(
+    hsv: np.ndarray,
+    channel: int,
+    mask_u8: np.ndarray,
+    bins: int,
+) -> np.ndarray:
+    """
+    Гистограмма одного HSV-канала по маске через cv2.calcHist
+    (биннинг в SIMD-C прямо по страйдовому каналу, без компактирования
+    значений под маской в отдельный массив).
+    """
+    hist = cv2.calcHist([hsv], [channel], mask_u8, [bins], [0, bins])
+    return hist.ravel().astype(np.int64)
+
+
+def _median_from_hist(hist: np.ndarray) -> float:
+    """
+    Медиана целочисленного распределения по его гистограмме: скан CDF
+    (cumsum + searchsorted по паре сотен бинов) вместо сортировки или
+    partition самих значений. Для чётного количества — среднее двух
+    средних порядковых статистик, как у np.median.
+    """
+    cdf = np.cumsum(hist)
+    n = int(cdf[-1])
+    if n == 0:
+        return 0.0
+
+    k = (n + 1) // 2
+    lo = float(np.searchsorted(cdf, k))
+    if n % 2:
+        return lo
+
+    hi = float(np.searchsorted(cdf, k + 1))
+    return 0.5 * (lo + hi)
+
+
+def _pil_to_hsv(image: Image.Image) -> np.ndarray:
+    """
+    HSV-каналы из PIL.Image без промежуточного RGB->BGR-прохода.
+
+    Маленькие кропы конвертируются одним проходом C-кода Pillow
+    (convert('HSV')), перешкалируется LUT'ом только Hue (0..255 Pillow ->
+    0..179 OpenCV). Большим сначала делается фокус-кроп на стороне PIL
+    и resize по RGB-массиву (порядок каналов для resize безразличен),
+    затем один cvtColor RGB->HSV.
+    """
+    w, h = image.size
+
+    if w * h < _SMALL_CROP_AREA:
+        hsv = np.array(image.convert("HSV"))
+        hsv[:, :, 0] = _PIL2CV_H[hsv[:, :, 0]]
+        return hsv
+
+    # Зеркалим логику _focus_on_car_body (грубая зона кузова)
+    if h >= 10 and w >= 10:
+        y1 = int(h * 0.15)
+        y2 = int(h * 0.90)
+        x1 = int(w * 0.10)
+        x2 = int(w * 0.90)
+        if y2 > y1 and x2 > x1:
+            image = image.crop((x1, y1, x2, y2))
+
+    rgb = np.asarray(image.convert("RGB"))
+    rgb = _resize_reasonable(rgb, target_area=160 * 160)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)
+
+
 def _to_bgr(image: Image.Image | np.ndarray) -> np.ndarray:
     """
     Приводит вход к BGR np.ndarray (uint8).
@@ -176,104 +300,76 @@ def _resize_reasonable(bgr: np.ndarray, target_area: int) -> np.ndarray:
     if 0.7 < scale < 1.4:
         return bgr
 
-    new_w = max(int(w * scale), 1)
-    new_h = max(int(h * scale), 1)
+    # Сильное уменьшение (больше чем в 2 раза): сначала дешёвые
+    # октавные cv2.pyrDown (box-среднее 2x2 в SIMD-C за один проход),
+    # и только остаток — точным INTER_AREA. Потребитель — цветовая
+    # статистика, разницы с полным area-ресайзом внизу по пайплайну нет.
+    while scale < 0.5:
+        bgr = cv2.pyrDown(bgr)
+        scale *= 2.0
+
+    new_w = max(int(bgr.shape[1] * scale), 1)
+    new_h = max(int(bgr.shape[0] * scale), 1)
     return cv2.resize(bgr, (new_w, new_h), interpolation=cv2.INTER_AREA)
 
 
-def _compute_chromatic_profile(
-    h_deg: np.ndarray,
-    s_norm: np.ndarray,
-    v_norm: np.ndarray,
-    chroma_mask: np.ndarray,
-) -> CarColorProfile:
+def _compute_chromatic_profile(hsv: np.ndarray) -> CarColorProfile:
     """
     Оценка цвета для хроматической машины.
 
-    Шаги:
-      1. Берём только хроматические пиксели.
-      2. Строим гистограмму hue (0..360) с шагом 5°.
-      3. Выбираем bin с максимальным количеством пикселей — доминирующий тон.
-      4. Оставляем пиксели в окне +/- 15° вокруг доминирующего bin.
-      5. Считаем окружное среднее для hue и медианы для s/v.
+    Гистограмма hue (шаг 5°), окно +/- 15° вокруг доминирующего бина,
+    аккумуляция sin/cos и 256-биновых гистограмм S/V слиты в одно
+    Numba-ядро (_car_color_jit.profile_chromatic): два прохода по
+    uint8-каналам вместо ~6 полноразмерных NumPy-проходов с
+    промежуточными масками. Здесь остаются только финальные скаляры:
+    окружное среднее hue и CDF-медианы s/v.
     """
-    h_vals = h_deg[chroma_mask]
-    s_vals = s_norm[chroma_mask]
-    v_vals = v_norm[chroma_mask]
-
-    if h_vals.size == 0:
-        # fallback на ахроматический метод
-        valid_mask = v_norm > 0.1
-        return _compute_achromatic_profile(h_deg, s_norm, v_norm, valid_mask)
-
-    # Гистограмма hue
-    bin_width = 5.0
-    bins = int(360.0 / bin_width)
-    hist, bin_edges = np.histogram(h_vals, bins=bins, range=(0.0, 360.0))
-
-    max_bin_idx = int(hist.argmax())
-    bin_center = (bin_edges[max_bin_idx] + bin_edges[max_bin_idx + 1]) / 2.0
-
-    # Окно вокруг доминирующего bin
-    window_half_width = 15.0
-
-    # Учитываем цикличность hue
-    lower = (bin_center - window_half_width) % 360.0
-    upper = (bin_center + window_half_width) % 360.0
-
-    if lower <= upper:
-        window_mask = (h_vals >= lower) & (h_vals <= upper)
-    else:
-        # Окно "переломилось" через 0°
-        window_mask = (h_vals >= lower) | (h_vals <= upper)
-
-    if not np.any(window_mask):
-        window_mask = np.ones_like(h_vals, dtype=bool)
+    sin_sum, cos_sum, count, s_hist, v_hist = _car_color_jit.profile_chromatic(
+        hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2], _V_MIN_U8, _S_CHROMA_U8
+    )
 
-    h_window = h_vals[window_mask]
-    s_window = s_vals[window_mask]
-    v_window = v_vals[window_mask]
+    if count == 0:
+        # fallback на ахроматический метод (теоретически недостижимо:
+        # вызывающий код уже проверил наличие хроматических пикселей)
+        valid_mask_u8 = (hsv[:, :, 2] > _V_MIN_U8).view(np.uint8)
+        return _compute_achromatic_profile(hsv, valid_mask_u8)
 
     # Окружное среднее по hue
-    h_rad = np.deg2rad(h_window)
-    mean_sin = float(np.mean(np.sin(h_rad)))
-    mean_cos = float(np.mean(np.cos(h_rad)))
-    mean_angle = np.arctan2(mean_sin, mean_cos)
-    mean_h_deg = float(np.rad2deg(mean_angle)) % 360.0
+    mean_h_deg = math.degrees(math.atan2(sin_sum, cos_sum)) % 360.0
 
-    # Медианы по s и v более устойчивы к выбросам
-    median_s = float(np.median(s_window))
-    median_v = float(np.median(v_window))
+    # Медианы по s и v более устойчивы к выбросам;
+    # в [0;1] переводим только итоговые скаляры
+    median_s = _median_from_hist(s_hist) / 255.0
+    median_v = _median_from_hist(v_hist) / 255.0
 
-    pixel_count = int(h_window.size)
     return CarColorProfile(
         h=mean_h_deg,
         s=median_s,
         v=median_v,
-        pixel_count=pixel_count,
+        pixel_count=count,
         is_chromatic=True,
     )
 
 
 def _compute_achromatic_profile(
-    h_deg: np.ndarray,
-    s_norm: np.ndarray,
-    v_norm: np.ndarray,
-    valid_mask: np.ndarray,
+    hsv: np.ndarray,
+    valid_mask_u8: np.ndarray,
 ) -> CarColorProfile:
     """
     Оценка для ахроматической машины (white/gray/black).
 
     Используем все валидные пиксели:
-      - медиана по hue, s, v
+      - CDF-медианы hue/s/v по масочным гистограммам calcHist,
+        без компактирования значений под маской
       - hue тут не особо важен (compute_color_score для white/gray/black
         в основном смотрит на s/v).
     """
-    h_vals = h_deg[valid_mask]
-    s_vals = s_norm[valid_mask]
-    v_vals = v_norm[valid_mask]
+    h_hist = _masked_hist(hsv, channel=0, mask_u8=valid_mask_u8, bins=180)
+    s_hist = _masked_hist(hsv, channel=1, mask_u8=valid_mask_u8, bins=256)
+    v_hist = _masked_hist(hsv, channel=2, mask_u8=valid_mask_u8, bins=256)
 
-    if h_vals.size == 0:
+    pixel_count = int(h_hist.sum())
+    if pixel_count == 0:
         # В теории не должно случиться, но на всякий случай.
         return CarColorProfile(
             h=0.0,
@@ -283,10 +379,9 @@ def _compute_achromatic_profile(
             is_chromatic=False,
         )
 
-    median_h = float(np.median(h_vals)) % 360.0
-    median_s = float(np.median(s_vals))
-    median_v = float(np.median(v_vals))
-    pixel_count = int(h_vals.size)
+    median_h = (_median_from_hist(h_hist) * 2.0) % 360.0
+    median_s = _median_from_hist(s_hist) / 255.0
+    median_v = _median_from_hist(v_hist) / 255.0
 
     return CarColorProfile(
         h=median_h,
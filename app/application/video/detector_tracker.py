@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import cv2
+
+from app.config import DETECT_EVERY_N_FRAMES
+from app.application.video.frame_iterator import RawFrame
+from app.application.video.object_detector import (
+    DetectedObject,
+    BBox,
+    detect_objects_on_frame,
+)
+
+
+class DetectorTrackerPipeline:
+    """
+    Гибрид «детекция + лёгкий трекинг»: полная YOLO-детекция запускается
+    раз в detect_every кадров, между ними боксы ведут лёгкие
+    OpenCV-трекеры (KCF) — на порядок дешевле полного инференса.
+
+    На промежуточных кадрах label/category/confidence/track_id берутся
+    из последней детекции, обновляется только bbox. Трекеры пересеваются
+    на каждой полной детекции; если трекер теряет объект или все объекты
+    потеряны, полная детекция форсируется на следующем кадре.
+
+    Требует OpenCV со сборкой contrib (модуль трекеров); если API
+    трекеров недоступен, конструктор бросит RuntimeError.
+    """
+
+    def __init__(
+        self,
+        detect_every: int = DETECT_EVERY_N_FRAMES,
+        conf_thres: float = 0.25,
+    ) -> None:
+        if detect_every < 1:
+            raise ValueError("detect_every must be >= 1")
+
+        # Ранняя проверка, что API трекеров вообще есть в этой сборке
+        _create_tracker()
+
+        self._detect_every = detect_every
+        self._conf_thres = conf_thres
+        # Пары (трекер, детекция-шаблон с последней полной детекции)
+        self._tracked: List[Tuple[object, DetectedObject]] = []
+        self._frames_since_detect: Optional[int] = None
+
+    def process_frame(self, frame: RawFrame) -> List[DetectedObject]:
+        """
+        Обрабатывает очередной кадр: полная детекция или шаг трекеров.
+        Кадры должны подаваться строго последовательно.
+        """
+        if (
+            self._frames_since_detect is None
+            or self._frames_since_detect >= self._detect_every - 1
+        ):
+            return self._detect_and_reseed(frame)
+
+        self._frames_since_detect += 1
+        return self._track_step(frame)
+
+    def _detect_and_reseed(self, frame: RawFrame) -> List[DetectedObject]:
+        detections = detect_objects_on_frame(
+            frame,
+            conf_thres=self._conf_thres,
+            use_tracking=True,
+        )
+
+        self._tracked = []
+        for det in detections:
+            tracker = _create_tracker()
+            tracker.init(
+                frame.image,
+                (det.bbox.x, det.bbox.y, det.bbox.width, det.bbox.height),
+            )
+            self._tracked.append((tracker, det))
+
+        self._frames_since_detect = 0
+        return detections
+
+    def _track_step(self, frame: RawFrame) -> List[DetectedObject]:
+        height, width = frame.image.shape[:2]
+
+        detected: List[DetectedObject] = []
+        survived: List[Tuple[object, DetectedObject]] = []
+
+        for tracker, template in self._tracked:
+            ok, box = tracker.update(frame.image)
+            if not ok:
+                # Объект потерян — не ведём его дальше
+                continue
+
+            x, y, w, h = box
+            x1 = max(0, int(x))
+            y1 = max(0, int(y))
+            x2 = min(width, int(x + w))
+            y2 = min(height, int(y + h))
+
+            if x2 <= x1 or y2 <= y1:
+                continue
+
+            survived.append((tracker, template))
+            detected.append(
+                DetectedObject(
+                    frame_index=frame.index,
+                    timestamp_sec=frame.timestamp_sec,
+                    category=template.category,
+                    label=template.label,
+                    confidence=template.confidence,
+                    bbox=BBox(
+                        x=x1,
+                        y=y1,
+                        width=x2 - x1,
+                        height=y2 - y1,
+                    ),
+                    track_id=template.track_id,
+                )
+            )
+
+        lost_any = len(survived) < len(self._tracked)
+        self._tracked = survived
+
+        if lost_any:
+            # Потерян хотя бы один объект — на следующем кадре полная
+            # детекция, иначе он выпадал бы из выдачи до конца каденции
+            self._frames_since_detect = self._detect_every
+
+        return detected
+
+
+def _create_tracker():
+    """
+    Создаёт лёгкий OpenCV-трекер. В новых сборках API живёт в
+    cv2.legacy, в старых — прямо в cv2.
+    """
+    legacy = getattr(cv2, "legacy", None)
+    if legacy is not None and hasattr(legacy, "TrackerKCF_create"):
+        return legacy.TrackerKCF_create()
+    if hasattr(cv2, "TrackerKCF_create"):
+        return cv2.TrackerKCF_create()
+    raise RuntimeError(
+        "OpenCV tracker API is not available (opencv-contrib-python required)"
+    )
@@ -1,20 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import os
+import queue
 import subprocess
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator, Union
+from typing import AsyncIterator, Iterator, Union
 
 import cv2
 import numpy as np
 
-from app.config import VIDEO_SOURCE, TARGET_FPS
+from app.config import VIDEO_SOURCE, TARGET_FPS, EMBED_BATCH_FRAMES
+
+# PyAV опционален: даёт многопоточный декод внутри libav и конверсию
+# в ndarray только для оставляемых кадров; без него работаем через cv2.
+try:
+    import av
+except ImportError:
+    av = None
 
 
 VideoSource = Union[str, Path]
 
+# Потолок очереди префетча: ~100 МБ при 1080p-кадрах
+_PREFETCH_FRAMES = 16
+
 
 @dataclass(frozen=True)
 class RawFrame:
@@ -56,21 +69,41 @@ def _build_basic_auth_header() -> str | None:
     return f"Authorization: Basic {token}"
 
 
-def _iter_frames_via_ffmpeg_http(
-    src: str,
-    target_fps: float,
-) -> Iterator[RawFrame]:
+def _parse_frame_rate(rate_str: str) -> float | None:
     """
-    Читает HTTP(S)/HLS (m3u8) поток через системный ffmpeg и
-    отдаёт кадры как RawFrame.
+    Парсит r_frame_rate из ffprobe ("30000/1001", "25/1") в float.
+    Возвращает None, если строка некорректна или знаменатель нулевой.
+    """
+    try:
+        num_str, _, den_str = rate_str.partition("/")
+        num = float(num_str)
+        den = float(den_str) if den_str else 1.0
+    except ValueError:
+        return None
 
-    Авторизация:
-      - заголовок Authorization: Basic ... передаётся явно через -headers
-      - URL берётся как есть (без user:pass@host), такой же, как в curl.
+    if den == 0:
+        return None
+    return num / den
+
+
+# Кэш параметров источника (width, height, src_fps): ffprobe на HLS —
+# это полный сетевой фетч манифеста и стартовых сегментов, то есть
+# удвоение сетевой работы до первого кадра. Параметры потока между
+# открытиями одного URL не меняются — платим за ffprobe один раз
+# на процесс.
+_probe_cache: dict[str, tuple[int, int, float | None]] = {}
+
+
+def _probe_video_params(src: str, auth_header: str | None) -> tuple[int, int, float | None]:
     """
-    auth_header = _build_basic_auth_header()
+    Возвращает (width, height, src_fps) для источника через ffprobe,
+    с кэшированием по URL. src_fps — None, если частоту кадров
+    определить не удалось.
+    """
+    cached = _probe_cache.get(src)
+    if cached is not None:
+        return cached
 
-    # 1) Получаем ширину/высоту через ffprobe
     probe_cmd: list[str] = [
         "ffprobe",
         "-v",
@@ -78,7 +111,7 @@ def _iter_frames_via_ffmpeg_http(
         "-select_streams",
         "v:0",
         "-show_entries",
-        "stream=width,height",
+        "stream=width,height,r_frame_rate",
         "-of",
         "csv=s=x:p=0",
     ]
@@ -124,7 +157,7 @@ def _iter_frames_via_ffmpeg_http(
         )
 
     try:
-        width_str, height_str = line.split("x", 1)
+        width_str, height_str, rate_str = line.split("x", 2)
         width = int(width_str)
         height = int(height_str)
     except ValueError as exc:
@@ -133,8 +166,44 @@ def _iter_frames_via_ffmpeg_http(
             f"stdout={stdout!r}"
         ) from exc
 
+    src_fps = _parse_frame_rate(rate_str)
+
+    params = (width, height, src_fps)
+    _probe_cache[src] = params
+    return params
+
+
+def _iter_frames_via_ffmpeg_http(
+    src: str,
+    target_fps: float,
+) -> Iterator[RawFrame]:
+    """
+    Читает HTTP(S)/HLS (m3u8) поток через системный ffmpeg и
+    отдаёт кадры как RawFrame.
+
+    Авторизация:
+      - заголовок Authorization: Basic ... передаётся явно через -headers
+      - URL берётся как есть (без user:pass@host), такой же, как в curl.
+    """
+    auth_header = _build_basic_auth_header()
+
+    # 1) Параметры потока (кэшируются по URL — см. _probe_video_params)
+    width, height, src_fps = _probe_video_params(src, auth_header)
+
     frame_size = width * height * 3  # bgr24: 3 байта на пиксель
 
+    # Децимация кадров: select='not(mod(n,step))' выбрасывает лишние
+    # кадры сразу после декодера, без ресэмплинга таймстампов fps-фильтра
+    # (тот может дублировать кадры при неровном входном потоке).
+    # Если fps источника узнать не удалось — остаёмся на fps=target_fps.
+    if src_fps is not None and src_fps > 0:
+        step = max(1, int(round(src_fps / target_fps)))
+        effective_fps = src_fps / step
+        vf = f"select='not(mod(n\\,{step}))',setpts=N/({effective_fps:.6f}*TB)"
+    else:
+        effective_fps = target_fps
+        vf = f"fps={target_fps}"
+
     # 2) Стартуем ffmpeg, который будет гнать сырые кадры в stdout
     ffmpeg_cmd: list[str] = [
         "ffmpeg",
@@ -150,7 +219,9 @@ def _iter_frames_via_ffmpeg_http(
         src,
         "-an",
         "-vf",
-        f"fps={target_fps}",
+        vf,
+        "-vsync",
+        "vfr",
         "-f",
         "image2pipe",
         "-pix_fmt",
@@ -172,25 +243,42 @@ def _iter_frames_via_ffmpeg_http(
             "ffmpeg не найден в PATH. Установи ffmpeg или добавь его в PATH."
         ) from exc
 
+    # Кольцо преаллоцированных кадровых буферов: readinto пишет пиксели
+    # из пайпа ffmpeg прямо в numpy-память, без свежего bytes-объекта и
+    # новой аллокации H*W*3 на каждый кадр. Кольцо с запасом больше
+    # очереди префетча плюс микробатча эмбеддингов (process_video
+    # удерживает до EMBED_BATCH_FRAMES кадров между батчами), чтобы
+    # буфер не переписывался, пока его кадр ещё жив у потребителя.
+    ring = [
+        np.empty((height, width, 3), dtype=np.uint8)
+        for _ in range(_PREFETCH_FRAMES + EMBED_BATCH_FRAMES + 4)
+    ]
+
     index = 0
     try:
         if process.stdout is None:
             raise RuntimeError("Не удалось открыть stdout ffmpeg.")
 
         while True:
-            raw = process.stdout.read(frame_size)
-            if not raw or len(raw) < frame_size:
-                break
+            buf = ring[index % len(ring)]
+            view = memoryview(buf).cast("B")
 
-            frame = np.frombuffer(raw, dtype=np.uint8)
-            frame = frame.reshape((height, width, 3))
+            filled = 0
+            while filled < frame_size:
+                n = process.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
 
-            timestamp_sec = index / float(target_fps)
+            if filled < frame_size:
+                break
+
+            timestamp_sec = index / float(effective_fps)
 
             yield RawFrame(
                 index=index,
                 timestamp_sec=timestamp_sec,
-                image=frame,
+                image=buf,
             )
             index += 1
 
@@ -215,6 +303,55 @@ def _iter_frames_via_ffmpeg_http(
             )
 
 
+def _iter_frames_via_pyav(
+    container,
+    target_fps: float,
+) -> Iterator[RawFrame]:
+    """
+    Читает кадры через PyAV (биндинги libav) из уже открытого контейнера.
+
+    Выигрыш против cv2.VideoCapture:
+      - thread_type='AUTO' включает многопоточный декод внутри libav;
+      - в BGR-ndarray конвертируются только кадры, попавшие на сетку
+        target_fps — cv2 копирует каждый декодированный кадр, даже те
+        step-1 из step, что тут же выбрасываются.
+    """
+    try:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        rate = stream.average_rate
+        fps = float(rate) if rate else None
+
+        if fps is None or fps <= 0:
+            fps = None
+            step = 1
+        else:
+            step = max(1, int(round(fps / target_fps)))
+
+        src_index = 0
+        out_index = 0
+
+        for frame in container.decode(stream):
+            if src_index % step == 0:
+                if frame.time is not None:
+                    timestamp = float(frame.time)
+                else:
+                    timestamp = (src_index / fps) if fps else float(src_index)
+
+                yield RawFrame(
+                    index=out_index,
+                    timestamp_sec=timestamp,
+                    image=frame.to_ndarray(format="bgr24"),
+                )
+                out_index += 1
+
+            src_index += 1
+
+    finally:
+        container.close()
+
+
 def _iter_frames_via_opencv(
     src: str,
     target_fps: float,
@@ -259,23 +396,151 @@ def _iter_frames_via_opencv(
         cap.release()
 
 
-def iter_video_frames(
+def _iter_prefetched(frames: Iterator[RawFrame]) -> Iterator[RawFrame]:
+    """
+    Производитель-потребитель поверх итератора кадров: чтение и декод
+    крутятся в фоновом потоке и складывают кадры в ограниченную
+    очередь, потребитель только забирает.
+
+    cv2/libav отпускают GIL на I/O и декоде, поэтому декод следующего
+    кадра перекрывается с YOLO/цветами/OCR текущего вместо того, чтобы
+    ждать их по очереди.
+    """
+    q: queue.Queue = queue.Queue(maxsize=_PREFETCH_FRAMES)
+    stop = threading.Event()
+    done = object()
+
+    def _producer() -> None:
+        try:
+            for frame in frames:
+                q.put(frame)
+                if stop.is_set():
+                    return
+            q.put(done)
+        except Exception as exc:  # пробрасываем ошибку декода потребителю
+            q.put(exc)
+
+    thread = threading.Thread(target=_producer, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Потребитель уходит раньше конца видео: останавливаем producer
+        # и разблокируем его, если он ждёт места в очереди
+        stop.set()
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                break
+
+
+def _open_source_frames(
     video_source: VideoSource,
     target_fps: float,
 ) -> Iterator[RawFrame]:
     """
-    Универсальный итератор кадров.
+    Выбирает и открывает подходящий декодер источника.
 
-    - Для HTTP(S) / HLS (m3u8 и т.п.) — используем внешний ffmpeg/ffprobe
+    - Для HTTP(S) / HLS (m3u8 и т.п.) — внешний ffmpeg/ffprobe
       с явным заголовком Authorization: Basic ...
-    - Для локальных файлов / rtsp — используем OpenCV VideoCapture.
+    - Для локальных файлов / rtsp — PyAV (если установлен),
+      иначе OpenCV VideoCapture.
     """
     src = _normalize_source(video_source)
 
+    frames: Iterator[RawFrame] | None = None
+
     if isinstance(src, str) and src.startswith(("http://", "https://")):
-        yield from _iter_frames_via_ffmpeg_http(src, target_fps)
-    else:
-        yield from _iter_frames_via_opencv(src, target_fps)
+        frames = _iter_frames_via_ffmpeg_http(src, target_fps)
+    elif av is not None:
+        # Открываем здесь, а не в генераторе: если PyAV не осилил
+        # источник, падаем обратно на cv2 до первого отданного кадра.
+        try:
+            container = av.open(src)
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] PyAV failed to open {src}: {exc}; falling back to OpenCV")
+        else:
+            frames = _iter_frames_via_pyav(container, target_fps)
+
+    if frames is None:
+        frames = _iter_frames_via_opencv(src, target_fps)
+
+    return frames
+
+
+def iter_video_frames(
+    video_source: VideoSource,
+    target_fps: float,
+) -> Iterator[RawFrame]:
+    """
+    Универсальный синхронный итератор кадров.
+
+    Декод — в фоновом потоке, обработка кадров идёт параллельно с ним.
+    """
+    yield from _iter_prefetched(_open_source_frames(video_source, target_fps))
+
+
+async def aiter_video_frames(
+    video_source: VideoSource,
+    target_fps: float,
+) -> AsyncIterator[RawFrame]:
+    """
+    Асинхронный вариант iter_video_frames для кода на event loop'е.
+
+    Декод крутится в фоновом потоке и складывает кадры в ограниченную
+    asyncio.Queue; потребитель делает await queue.get() и не блокирует
+    loop — пока корутина ждёт кадр, успевают выполняться фоновые задачи
+    (сбросы в БД и т.п.). Ограничение очереди даёт backpressure: декодер
+    не убегает вперёд, если обработка медленнее.
+    """
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue(maxsize=_PREFETCH_FRAMES)
+    stop = threading.Event()
+    done = object()
+
+    def _put(item) -> None:
+        # Блокирует поток-производитель, пока в очереди нет места
+        asyncio.run_coroutine_threadsafe(q.put(item), loop).result()
+
+    def _producer() -> None:
+        try:
+            for frame in _open_source_frames(video_source, target_fps):
+                _put(frame)
+                if stop.is_set():
+                    return
+            _put(done)
+        except Exception as exc:  # пробрасываем ошибку декода потребителю
+            try:
+                _put(exc)
+            except RuntimeError:
+                # Event loop уже закрыт — потребителя больше нет
+                pass
+
+    thread = threading.Thread(target=_producer, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = await q.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Потребитель уходит раньше конца видео: останавливаем producer
+        # и разблокируем его, если он ждёт места в очереди
+        stop.set()
+        while not q.empty():
+            q.get_nowait()
 
 
 def iter_default_video_frames() -> Iterator[RawFrame]:
@@ -4,11 +4,13 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import List, Optional, Tuple
 
+import cv2
 import numpy as np
 from ultralytics import YOLO
 
-from app.config import YOLO_OBJECTS_MODEL
+from app.config import YOLO_OBJECTS_MODEL, YOLO_DETECT_BATCH_SIZE
 from app.application.video.frame_iterator import RawFrame
+from app.application.video.yolo_loader import HALF_INFERENCE, load_yolo_model
 
 
 _VEHICLE_LABELS = {"car", "truck", "bus", "motorcycle", "train"}
@@ -57,11 +59,24 @@ def _get_objects_model() -> YOLO:
         if not YOLO_OBJECTS_MODEL.exists():
             raise FileNotFoundError(f"YOLO objects model not found: {YOLO_OBJECTS_MODEL}")
 
-        _YOLO_OBJECTS_MODEL_INSTANCE = YOLO(str(YOLO_OBJECTS_MODEL))
+        _YOLO_OBJECTS_MODEL_INSTANCE = load_yolo_model(YOLO_OBJECTS_MODEL)
 
     return _YOLO_OBJECTS_MODEL_INSTANCE
 
 
+def warmup_object_detector() -> None:
+    """
+    Прогрев модели объектов: первая инференция платит за загрузку весов
+    и автотюнинг бэкенда секунды — выносим её со «счёта» первого
+    реального кадра на старт сервиса.
+    """
+    _get_objects_model()(
+        np.zeros((640, 640, 3), dtype=np.uint8),
+        half=HALF_INFERENCE,
+        verbose=False,
+    )
+
+
 def detect_objects_on_frame(
     frame: RawFrame,
     conf_thres: float = 0.25,
@@ -78,7 +93,6 @@ def detect_objects_on_frame(
     model = _get_objects_model()
 
     image: np.ndarray = frame.image
-    height, width = image.shape[:2]
 
     if use_tracking:
         # persist=True — YOLO будет хранить состояние трекера между вызовами
@@ -86,6 +100,7 @@ def detect_objects_on_frame(
             image,
             conf=conf_thres,
             persist=True,
+            half=HALF_INFERENCE,
             verbose=False,
         )[0]
     else:
@@ -93,49 +108,250 @@ def detect_objects_on_frame(
         result = model(
             image,
             conf=conf_thres,
+            half=HALF_INFERENCE,
             verbose=False,
         )[0]
 
+    return _parse_result(result, frame, use_tracking=use_tracking)
+
+
+def detect_objects_on_frames(
+    frames: List[RawFrame],
+    conf_thres: float = 0.25,
+    batch_size: int = YOLO_DETECT_BATCH_SIZE,
+) -> List[List[DetectedObject]]:
+    """
+    Пакетная детекция: один вызов модели на пачку кадров вместо вызова
+    на каждый кадр — препроцессинг и запуск инференса амортизируются
+    по всему батчу.
+
+    Трекинг здесь недоступен: встроенный трекер YOLO хранит состояние
+    и требует строго последовательных вызовов по одному кадру, поэтому
+    track_id у результатов всегда None. Если нужен трекинг — используйте
+    detect_objects_on_frame(use_tracking=True).
+
+    Возвращает список списков DetectedObject, по одному на входной кадр.
+    """
+    model = _get_objects_model()
+
+    detected_per_frame: List[List[DetectedObject]] = []
+
+    for start in range(0, len(frames), batch_size):
+        chunk = frames[start:start + batch_size]
+        results = model(
+            [frame.image for frame in chunk],
+            conf=conf_thres,
+            half=HALF_INFERENCE,
+            verbose=False,
+        )
+        for frame, result in zip(chunk, results):
+            detected_per_frame.append(_parse_result(result, frame, use_tracking=False))
+
+    return detected_per_frame
+
+
+def detect_objects_on_frames_mosaic(
+    frames: List[RawFrame],
+    conf_thres: float = 0.25,
+    mosaic_size: int = 4,
+    canvas_size: int = 640,
+) -> List[List[DetectedObject]]:
+    """
+    Мозаичная детекция: до mosaic_size кадров уменьшаются и укладываются
+    плиткой на один холст canvas_size x canvas_size, после чего модель
+    вызывается один раз на холст вместо вызова на каждый кадр. Боксы
+    демапятся обратно в координаты исходного кадра по плитке, в которую
+    попал центр бокса.
+
+    Это компромисс точность/скорость: мелкие объекты на уменьшенных
+    плитках детектируются заметно хуже, чем при покадровой детекции.
+    Трекинг недоступен, track_id всегда None.
+
+    Возвращает список списков DetectedObject, по одному на входной кадр.
+    """
+    model = _get_objects_model()
+
+    # Квадратная сетка: минимальное grid, у которого grid^2 >= mosaic_size
+    grid = 1
+    while grid * grid < mosaic_size:
+        grid += 1
+    tile_size = canvas_size // grid
+
+    detected_per_frame: List[List[DetectedObject]] = []
+
+    for start in range(0, len(frames), mosaic_size):
+        chunk = frames[start:start + mosaic_size]
+
+        canvas = np.zeros((canvas_size, canvas_size, 3), dtype=np.uint8)
+        # (x_off, y_off, scale_x, scale_y) каждой занятой плитки
+        tiles: List[Tuple[int, int, float, float]] = []
+
+        for tile_index, frame in enumerate(chunk):
+            row, col = divmod(tile_index, grid)
+            x_off = col * tile_size
+            y_off = row * tile_size
+
+            height, width = frame.image.shape[:2]
+            resized = cv2.resize(
+                frame.image,
+                (tile_size, tile_size),
+                interpolation=cv2.INTER_AREA,
+            )
+            canvas[y_off:y_off + tile_size, x_off:x_off + tile_size] = resized
+            tiles.append((x_off, y_off, width / tile_size, height / tile_size))
+
+        result = model(canvas, conf=conf_thres, half=HALF_INFERENCE, verbose=False)[0]
+        names = result.names
+        boxes = result.boxes
+
+        chunk_detected: List[List[DetectedObject]] = [[] for _ in chunk]
+
+        # Тензоры боксов — одним переносом на CPU (см. _parse_result)
+        cls_ids = boxes.cls.cpu().numpy().astype(int)
+        confs = boxes.conf.cpu().numpy()
+        xyxy = boxes.xyxy.cpu().numpy()
+
+        category_by_id = _category_map(names)
+
+        for i in range(len(boxes)):
+            cls_id = int(cls_ids[i])
+            category = category_by_id.get(cls_id)
+            if category is None:
+                continue
+
+            raw_label = names[cls_id]
+
+            x1, y1, x2, y2 = xyxy[i]
+
+            # Плитку определяем по центру бокса; боксы, «перетёкшие»
+            # через границу плитки, обрезаются по её краям.
+            cx = (x1 + x2) / 2.0
+            cy = (y1 + y2) / 2.0
+            tile_index = int(cy // tile_size) * grid + int(cx // tile_size)
+            if tile_index >= len(chunk):
+                continue
+
+            x_off, y_off, scale_x, scale_y = tiles[tile_index]
+            frame = chunk[tile_index]
+            height, width = frame.image.shape[:2]
+
+            x1_i = max(0, int((max(x1, x_off) - x_off) * scale_x))
+            y1_i = max(0, int((max(y1, y_off) - y_off) * scale_y))
+            x2_i = min(width, int((min(x2, x_off + tile_size) - x_off) * scale_x))
+            y2_i = min(height, int((min(y2, y_off + tile_size) - y_off) * scale_y))
+
+            if x2_i <= x1_i or y2_i <= y1_i:
+                continue
+
+            chunk_detected[tile_index].append(
+                DetectedObject(
+                    frame_index=frame.index,
+                    timestamp_sec=frame.timestamp_sec,
+                    category=category,
+                    label=raw_label,
+                    confidence=float(confs[i]),
+                    bbox=BBox(
+                        x=x1_i,
+                        y=y1_i,
+                        width=x2_i - x1_i,
+                        height=y2_i - y1_i,
+                    ),
+                )
+            )
+
+        detected_per_frame.extend(chunk_detected)
+
+    return detected_per_frame
+
+
+def _category_from_label(raw_label: str) -> Optional[DetectedObjectCategory]:
+    """
+    Категория по метке класса YOLO; None — класс нам не интересен.
+    """
+    if raw_label == "person":
+        return DetectedObjectCategory.PERSON
+    if raw_label in _VEHICLE_LABELS:
+        return DetectedObjectCategory.TRANSPORT
+    return None
+
+
+# Кэш отображения class_id -> категория по id словаря names: names
+# статичен и живёт столько же, сколько модель-синглтон, а отображение
+# строится один раз вместо lookup'а по строке на каждый бокс.
+_category_map_cache: dict[int, dict[int, DetectedObjectCategory]] = {}
+
+
+def _category_map(names: dict) -> dict[int, DetectedObjectCategory]:
+    cached = _category_map_cache.get(id(names))
+    if cached is None:
+        cached = {}
+        for cls_id, name in names.items():
+            category = _category_from_label(name)
+            if category is not None:
+                cached[cls_id] = category
+        _category_map_cache[id(names)] = cached
+    return cached
+
+
+def _parse_result(
+    result,
+    frame: RawFrame,
+    use_tracking: bool,
+) -> List[DetectedObject]:
+    """
+    Разбирает боксы одного результата YOLO в список DetectedObject.
+    """
+    height, width = frame.image.shape[:2]
+
     boxes = result.boxes
     names = result.names
 
+    n = len(boxes)
+    if n == 0:
+        return []
+
+    # Один перенос тензоров на CPU и колоночный clip вместо поэлементных
+    # box.cls[0]/box.xyxy[0]/box.conf[0]: каждое такое обращение — это
+    # отдельная синхронизация с устройством и создание Python-объектов.
+    cls_ids = boxes.cls.cpu().numpy().astype(int)
+    confs = boxes.conf.cpu().numpy()
+    xyxy = boxes.xyxy.cpu().numpy()
+
+    track_ids = None
+    if use_tracking and boxes.id is not None:
+        track_ids = boxes.id.cpu().numpy().astype(int)
+
+    x1s = np.clip(xyxy[:, 0].astype(np.int64), 0, width)
+    y1s = np.clip(xyxy[:, 1].astype(np.int64), 0, height)
+    x2s = np.clip(xyxy[:, 2].astype(np.int64), 0, width)
+    y2s = np.clip(xyxy[:, 3].astype(np.int64), 0, height)
+
+    category_by_id = _category_map(names)
+
     detected: List[DetectedObject] = []
 
-    for box in boxes:
-        cls_id = int(box.cls[0])
-        raw_label = names.get(cls_id, "")
+    for i in range(n):
+        cls_id = int(cls_ids[i])
 
-        if raw_label == "person":
-            category = DetectedObjectCategory.PERSON
-        elif raw_label in _VEHICLE_LABELS:
-            category = DetectedObjectCategory.TRANSPORT
-        else:
+        category = category_by_id.get(cls_id)
+        if category is None:
             # Остальные классы нам пока не интересны
             continue
 
-        x1, y1, x2, y2 = _xyxy_from_box(box)
+        raw_label = names[cls_id]
 
-        x1_i = max(0, int(x1))
-        y1_i = max(0, int(y1))
-        x2_i = min(width, int(x2))
-        y2_i = min(height, int(y2))
+        x1_i = int(x1s[i])
+        y1_i = int(y1s[i])
+        x2_i = int(x2s[i])
+        y2_i = int(y2s[i])
 
         if x2_i <= x1_i or y2_i <= y1_i:
             # Защита от вырожденных боксов
             continue
 
-        bbox = BBox(
-            x=x1_i,
-            y=y1_i,
-            width=x2_i - x1_i,
-            height=y2_i - y1_i,
-        )
-
-        confidence = float(box.conf[0])
-
         track_id: Optional[int] = None
-        if use_tracking and box.id is not None:
-            track_id = int(box.id[0])
+        if track_ids is not None:
+            track_id = int(track_ids[i])
 
         detected.append(
             DetectedObject(
@@ -143,8 +359,13 @@ def detect_objects_on_frame(
                 timestamp_sec=frame.timestamp_sec,
                 category=category,
                 label=raw_label,
-                confidence=confidence,
-                bbox=bbox,
+                confidence=float(confs[i]),
+                bbox=BBox(
+                    x=x1_i,
+                    y=y1_i,
+                    width=x2_i - x1_i,
+                    height=y2_i - y1_i,
+                ),
                 track_id=track_id,
             )
         )
@@ -152,12 +373,3 @@ def detect_objects_on_frame(
     return detected
 
 
-def _xyxy_from_box(box) -> Tuple[float, float, float, float]:
-    """
-    Вытаскивает координаты x1, y1, x2, y2 из YOLO-бокса.
-    """
-    x1 = float(box.xyxy[0][0])
-    y1 = float(box.xyxy[0][1])
-    x2 = float(box.xyxy[0][2])
-    y2 = float(box.xyxy[0][3])
-    return x1, y1, x2, y2
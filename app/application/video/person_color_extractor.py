@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import math
+import threading
 from dataclasses import dataclass
 from typing import Optional
 
@@ -7,6 +9,29 @@ import cv2
 import numpy as np
 from PIL import Image
 
+from app.application.video import _person_color_jit
+
+# Пороги в uint8-шкале OpenCV: точные эквиваленты прежних float-срезов
+# v_norm > 0.1 и s_norm > 0.35
+_V_MIN_U8 = int(0.1 * 255)
+_S_CHROMA_U8 = int(0.35 * 255)
+
+# Скретч-буфер HSV на поток: cvtColor пишет в него через dst вместо
+# свежей аллокации на каждую зону каждого человека в кадре. Буфер
+# потребляется ядром целиком внутри того же вызова, так что повторное
+# использование безопасно.
+_SCRATCH = threading.local()
+
+
+def _bgr_to_hsv_scratch(bgr_region: np.ndarray) -> np.ndarray:
+    buf = getattr(_SCRATCH, "hsv", None)
+    if buf is None or buf.shape != bgr_region.shape:
+        buf = np.empty(bgr_region.shape, dtype=np.uint8)
+        _SCRATCH.hsv = buf
+
+    cv2.cvtColor(bgr_region, cv2.COLOR_BGR2HSV, dst=buf)
+    return buf
+
 
 @dataclass(frozen=True)
 class RegionColor:
@@ -43,6 +68,7 @@ class PersonColorProfile:
 def extract_person_color_profile(
     image: Image.Image | np.ndarray,
     min_valid_fraction: float = 0.03,
+    hsv_crop: Optional[np.ndarray] = None,
 ) -> PersonColorProfile:
     """
     Оценка цветов верхней и нижней части одежды по кропу человека.
@@ -61,10 +87,24 @@ def extract_person_color_profile(
          - отбрасываем очень тёмные пиксели (теневые),
          - решаем, хроматическая зона или ахроматическая,
          - выдаём RegionColor или None, если данных мало.
+
+    hsv_crop — уже посчитанный HSV того же кропа (обычно view из
+    полнокадрового cvtColor); используется без повторной конвертации,
+    если по размерам не требуется resize.
     """
-    bgr_full = _to_bgr(image)
+    hsv_full = _usable_hsv_view(hsv_crop) if hsv_crop is not None else None
+    if hsv_full is not None:
+        hsv_center = _central_strip(hsv_full, x_margin_ratio=0.15)
+        upper_hsv, lower_hsv = _split_upper_lower(hsv_center)
+        return PersonColorProfile(
+            upper_color=_region_color_from_hsv(upper_hsv, min_valid_fraction),
+            lower_color=_region_color_from_hsv(lower_hsv, min_valid_fraction),
+        )
+
+    bgr_full = _to_bgr(image, target_area=140 * 80)
 
     # Немного нормализуем размер, чтобы сгладить шум, не теряя деталей.
+    # Для PIL-входа это уже no-op: кроп уменьшен до конвертации.
     bgr_full = _resize_reasonable(bgr_full, target_area=140 * 80)
 
     # Центр по ширине (уменьшаем влияние фона по бокам).
@@ -86,11 +126,50 @@ def extract_person_color_profile(
 # ==========================
 
 
-def _to_bgr(image: Image.Image | np.ndarray) -> np.ndarray:
+def _usable_hsv_view(hsv_crop: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Возвращает view готового HSV-кропа, если статистику можно считать
+    без resize (тот же критерий масштаба, что и в BGR-ветке). Иначе
+    None: интерполяция канала Hue ломает кольцевую шкалу на стыке
+    179/0, поэтому при масштабировании конвертируем из BGR заново.
+    """
+    if hsv_crop.ndim != 3 or hsv_crop.shape[2] != 3:
+        return None
+
+    h, w = hsv_crop.shape[:2]
+    area = h * w
+    if area == 0:
+        return None
+
+    scale = (140 * 80 / float(area)) ** 0.5
+    if 0.7 < scale < 1.4:
+        return hsv_crop
+
+    return None
+
+
+def _to_bgr(
+    image: Image.Image | np.ndarray,
+    target_area: Optional[int] = None,
+) -> np.ndarray:
     """
     Приводит вход к BGR np.ndarray (uint8).
+
+    Для PIL-входа сначала уменьшает кроп до target_area и только потом
+    конвертирует: convert/cvtColor на полном разрешении — лишние байты,
+    объём работы линеен по числу пикселей.
     """
     if isinstance(image, Image.Image):
+        if target_area is not None:
+            w, h = image.size
+            area = w * h
+            if area > 0:
+                scale = (target_area / float(area)) ** 0.5
+                if not (0.7 < scale < 1.4):
+                    new_w = max(int(w * scale), 1)
+                    new_h = max(int(h * scale), 1)
+                    image = image.resize((new_w, new_h), Image.BILINEAR)
+
         rgb = np.array(image.convert("RGB"))
         return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
 
@@ -140,7 +219,9 @@ def _central_strip(bgr: np.ndarray, x_margin_ratio: float = 0.15) -> np.ndarray:
     if x2 <= x1:
         return bgr
 
-    return bgr[:, x1:x2].copy()
+    # Возвращаем view, а не копию: дальше полоса только читается
+    # (cvtColor копий не требует), так что memcpy здесь — чистый расход.
+    return bgr[:, x1:x2]
 
 
 def _split_upper_lower(bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
@@ -154,7 +235,7 @@ def _split_upper_lower(bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """
     h, w = bgr.shape[:2]
     if h < 10:
-        return bgr.copy(), bgr.copy()
+        return bgr, bgr
 
     y_upper_top = int(h * 0.15)
     y_upper_bottom = int(h * 0.55)
@@ -170,8 +251,9 @@ def _split_upper_lower(bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
         y_lower_top = y_upper_bottom
         y_lower_bottom = h
 
-    upper = bgr[y_upper_top:y_upper_bottom, :].copy()
-    lower = bgr[y_lower_top:y_lower_bottom, :].copy()
+    # View-срезы без копий: зоны дальше только читаются
+    upper = bgr[y_upper_top:y_upper_bottom, :]
+    lower = bgr[y_lower_top:y_lower_bottom, :]
 
     return upper, lower
 
@@ -188,140 +270,96 @@ def _compute_region_color(
     if bgr_region.size == 0:
         return None
 
-    hsv = cv2.cvtColor(bgr_region, cv2.COLOR_BGR2HSV)
+    hsv = _bgr_to_hsv_scratch(bgr_region)
+    return _region_color_from_hsv(hsv, min_valid_fraction)
+
 
-    h_cv = hsv[:, :, 0].astype(np.float32)  # [0; 179]
-    s_cv = hsv[:, :, 1].astype(np.float32)  # [0; 255]
-    v_cv = hsv[:, :, 2].astype(np.float32)  # [0; 255]
+def _region_color_from_hsv(
+    hsv: np.ndarray,
+    min_valid_fraction: float,
+) -> Optional[RegionColor]:
+    """
+    Профиль зоны по её HSV-каналам (общий хвост для BGR-ветки и
+    готовых HSV-view).
+    """
+    if hsv.size == 0:
+        return None
 
-    h_deg = h_cv * 2.0
-    s_norm = s_cv / 255.0
-    v_norm = v_cv / 255.0
+    # Всё тяжёлое — одним слитым Numba-ядром по uint8-каналам HSV:
+    # счётчики, гистограммы и суммы sin/cos вместо ~8 NumPy-проходов
+    # с временными float-массивами.
+    (
+        valid_count,
+        chroma_count,
+        sin_sum,
+        cos_sum,
+        win_count,
+        h_hist_valid,
+        s_hist_valid,
+        v_hist_valid,
+        s_win_hist,
+        v_win_hist,
+    ) = _person_color_jit.region_profile(
+        hsv[:, :, 0],
+        hsv[:, :, 1],
+        hsv[:, :, 2],
+        _V_MIN_U8,
+        _S_CHROMA_U8,
+    )
 
-    # Отбрасываем совсем тёмное (тени, шум):
-    valid_mask = v_norm > 0.1
-    if not np.any(valid_mask):
+    if valid_count == 0:
         return None
 
-    total_pixels = h_deg.size
-    valid_count = int(valid_mask.sum())
+    total_pixels = hsv.shape[0] * hsv.shape[1]
     if valid_count / float(total_pixels) < min_valid_fraction:
         return None
 
     # Общая оценка "цветности" зоны по медиане насыщенности.
-    s_all = s_norm[valid_mask]
-    median_s_all = float(np.median(s_all))
-
-    # Кандидаты в хроматические пиксели: достаточно насыщенные
-    chroma_mask = valid_mask & (s_norm > 0.35)
-    chroma_count = int(chroma_mask.sum())
+    median_s_all = _median_from_hist(s_hist_valid) / 255.0
     chroma_fraction = chroma_count / float(total_pixels)
 
     # Зону считаем хроматической, только если:
     #   - есть заметное количество насыщенных пикселей,
     #   - и средняя насыщенность не маленькая.
-    if chroma_count > 0 and chroma_fraction >= 0.10 and median_s_all > 0.25:
-        return _compute_chromatic_profile(h_deg, s_norm, v_norm, chroma_mask)
+    if (
+        chroma_count > 0
+        and chroma_fraction >= 0.10
+        and median_s_all > 0.25
+        and win_count > 0
+    ):
+        mean_h_deg = math.degrees(math.atan2(sin_sum, cos_sum)) % 360.0
+        return RegionColor(
+            h=mean_h_deg,
+            s=_median_from_hist(s_win_hist) / 255.0,
+            v=_median_from_hist(v_win_hist) / 255.0,
+            pixel_count=int(win_count),
+            is_chromatic=True,
+        )
 
     # Иначе — ахроматическая зона (white/gray/black).
-    return _compute_achromatic_profile(h_deg, s_norm, v_norm, valid_mask)
-
-
-def _compute_chromatic_profile(
-    h_deg: np.ndarray,
-    s_norm: np.ndarray,
-    v_norm: np.ndarray,
-    chroma_mask: np.ndarray,
-) -> RegionColor:
-    """
-    Оценка цвета для хроматической области (яркая одежда).
-    """
-    h_vals = h_deg[chroma_mask]
-    s_vals = s_norm[chroma_mask]
-    v_vals = v_norm[chroma_mask]
-
-    if h_vals.size == 0:
-        # fallback — считаем как ахроматическую область
-        valid_mask = v_norm > 0.1
-        return _compute_achromatic_profile(h_deg, s_norm, v_norm, valid_mask)
-
-    # Гистограмма hue
-    bin_width = 5.0
-    bins = int(360.0 / bin_width)
-    hist, bin_edges = np.histogram(h_vals, bins=bins, range=(0.0, 360.0))
-
-    max_bin_idx = int(hist.argmax())
-    bin_center = (bin_edges[max_bin_idx] + bin_edges[max_bin_idx + 1]) / 2.0
-
-    # Окно вокруг доминирующего bin
-    window_half_width = 15.0
-
-    lower = (bin_center - window_half_width) % 360.0
-    upper = (bin_center + window_half_width) % 360.0
-
-    if lower <= upper:
-        window_mask = (h_vals >= lower) & (h_vals <= upper)
-    else:
-        window_mask = (h_vals >= lower) | (h_vals <= upper)
-
-    if not np.any(window_mask):
-        window_mask = np.ones_like(h_vals, dtype=bool)
-
-    h_window = h_vals[window_mask]
-    s_window = s_vals[window_mask]
-    v_window = v_vals[window_mask]
-
-    # Окружное среднее по hue
-    h_rad = np.deg2rad(h_window)
-    mean_sin = float(np.mean(np.sin(h_rad)))
-    mean_cos = float(np.mean(np.cos(h_rad)))
-    mean_angle = np.arctan2(mean_sin, mean_cos)
-    mean_h_deg = float(np.rad2deg(mean_angle)) % 360.0
-
-    median_s = float(np.median(s_window))
-    median_v = float(np.median(v_window))
-    pixel_count = int(h_window.size)
-
+    median_h = (_median_from_hist(h_hist_valid) * 2.0) % 360.0
     return RegionColor(
-        h=mean_h_deg,
-        s=median_s,
-        v=median_v,
-        pixel_count=pixel_count,
-        is_chromatic=True,
+        h=median_h,
+        s=median_s_all,
+        v=_median_from_hist(v_hist_valid) / 255.0,
+        pixel_count=int(valid_count),
+        is_chromatic=False,
     )
 
 
-def _compute_achromatic_profile(
-    h_deg: np.ndarray,
-    s_norm: np.ndarray,
-    v_norm: np.ndarray,
-    valid_mask: np.ndarray,
-) -> RegionColor:
+def _median_from_hist(hist: np.ndarray) -> float:
     """
-    Оценка для ахроматической области (white/gray/black).
+    Медиана значений по их гистограмме через скан CDF.
+    Совпадает с np.median по исходным значениям (включая усреднение
+    двух середин при чётном количестве).
     """
-    h_vals = h_deg[valid_mask]
-    s_vals = s_norm[valid_mask]
-    v_vals = v_norm[valid_mask]
-
-    if h_vals.size == 0:
-        return RegionColor(
-            h=0.0,
-            s=0.0,
-            v=0.0,
-            pixel_count=0,
-            is_chromatic=False,
-        )
-
-    median_h = float(np.median(h_vals)) % 360.0
-    median_s = float(np.median(s_vals))
-    median_v = float(np.median(v_vals))
-    pixel_count = int(h_vals.size)
-
-    return RegionColor(
-        h=median_h,
-        s=median_s,
-        v=median_v,
-        pixel_count=pixel_count,
-        is_chromatic=False,
-    )
+    cdf = np.cumsum(hist)
+    n = int(cdf[-1])
+    if n == 0:
+        return 0.0
+
+    k = (n + 1) // 2
+    lo = int(np.searchsorted(cdf, k))
+    if n % 2 == 1:
+        return float(lo)
+    return 0.5 * (lo + int(np.searchsorted(cdf, k + 1)))
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
@@ -7,6 +8,7 @@ import numpy as np
 from ultralytics import YOLO
 
 from app.config import YOLO_PLATES_MODEL
+from app.application.video.yolo_loader import HALF_INFERENCE, load_yolo_model
 
 
 @dataclass(frozen=True)
@@ -35,56 +37,230 @@ def _get_plates_model() -> YOLO:
         if not YOLO_PLATES_MODEL.exists():
             raise FileNotFoundError(f"YOLO plates model not found: {YOLO_PLATES_MODEL}")
 
-        _YOLO_PLATES_MODEL_INSTANCE = YOLO(str(YOLO_PLATES_MODEL))
+        _YOLO_PLATES_MODEL_INSTANCE = load_yolo_model(YOLO_PLATES_MODEL)
 
     return _YOLO_PLATES_MODEL_INSTANCE
 
 
-def detect_plates_on_vehicle(
+def warmup_plate_detector() -> None:
+    """
+    Прогрев модели номеров — та же логика, что и у детектора объектов:
+    загрузка весов и автотюнинг бэкенда происходят на старте сервиса,
+    а не на первом реальном кропе.
+    """
+    _get_plates_model()(
+        np.zeros((640, 640, 3), dtype=np.uint8),
+        half=HALF_INFERENCE,
+        verbose=False,
+    )
+
+
+# Кэш ROI номера по track_id: номер между кадрами почти не смещается
+# внутри кропа ТС, поэтому повторную детекцию можно гонять по небольшому
+# окну вокруг прошлой находки вместо полного кропа.
+_ROI_CACHE_TTL = 10
+_ROI_CACHE_MAX = 256
+_ROI_PAD = 0.5
+
+_plate_roi_cache: OrderedDict[int, Tuple[PlateDetection, int]] = OrderedDict()
+
+
+def _roi_window(
     vehicle_image: np.ndarray,
+    roi: PlateDetection,
+) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Окно вокруг прошлой находки (+/- _ROI_PAD её размера), обрезанное
+    границами кропа. None — окно выродилось (кроп резко сменил размер).
+    """
+    h, w = vehicle_image.shape[:2]
+
+    pad_x = int(roi.width * _ROI_PAD)
+    pad_y = int(roi.height * _ROI_PAD)
+
+    x1 = max(0, roi.x - pad_x)
+    y1 = max(0, roi.y - pad_y)
+    x2 = min(w, roi.x + roi.width + pad_x)
+    y2 = min(h, roi.y + roi.height + pad_y)
+
+    if x2 <= x1 or y2 <= y1:
+        return None
+
+    return x1, y1, x2, y2
+
+
+def _cache_roi(
+    track_id: int,
+    best: PlateDetection,
+    ttl: int = _ROI_CACHE_TTL,
+) -> None:
+    _plate_roi_cache[track_id] = (best, ttl)
+    _plate_roi_cache.move_to_end(track_id)
+    while len(_plate_roi_cache) > _ROI_CACHE_MAX:
+        _plate_roi_cache.popitem(last=False)
+
+
+def detect_plates_on_vehicles(
+    vehicle_images: List[np.ndarray],
     conf_thres: float = 0.25,
-) -> List[PlateDetection]:
+    track_ids: Optional[List[Optional[int]]] = None,
+) -> List[List[PlateDetection]]:
     """
-    Запускает детекцию номеров на кропе транспортного средства.
-    Возвращает список PlateDetection с координатами внутри vehicle_image.
+    Батчевая детекция номеров: один вызов модели на список кропов ТС
+    вместо вызова на каждый кроп. Возвращает список списков
+    PlateDetection, выровненный по входу; координаты каждой детекции —
+    внутри соответствующего кропа.
+
+    track_ids (выровнен по vehicle_images, None-элементы допустимы)
+    включает кэш ROI: для трека с закэшированной прошлой находкой в
+    батч уходит не полный кроп, а небольшое окно вокруг неё — меньше
+    пикселей на препроцессинг и инференс. Промахи ROI перегоняются по
+    полному кропу вторым батчем, а раз в _ROI_CACHE_TTL кадров полный
+    проход форсируется, чтобы окно не «уползло» за номером. Кэш имеет
+    смысл только если кроп от кадра к кадру строится по bbox того же
+    трека.
     """
+    if not vehicle_images:
+        return []
+
+    if track_ids is None:
+        track_ids = [None] * len(vehicle_images)
+
     model = _get_plates_model()
 
+    # Для каждого кропа решаем, что пойдёт в модель: ROI-окно (если для
+    # трека есть живой кэш) или полный кроп. offsets переводит координаты
+    # результатов обратно в систему полного кропа, roi_ttls помечает
+    # ROI-входы их текущим TTL.
+    inputs: List[np.ndarray] = []
+    offsets: List[Tuple[int, int]] = []
+    roi_ttls: List[Optional[int]] = []
+
+    for image, track_id in zip(vehicle_images, track_ids):
+        window = None
+        ttl = None
+
+        if track_id is not None:
+            cached = _plate_roi_cache.get(track_id)
+            if cached is not None:
+                roi, ttl = cached
+                if ttl > 0:
+                    window = _roi_window(image, roi)
+                if window is None:
+                    # Истёкший TTL или выродившееся окно — кэшу больше
+                    # нельзя верить
+                    _plate_roi_cache.pop(track_id, None)
+                    ttl = None
+
+        if window is None:
+            inputs.append(image)
+            offsets.append((0, 0))
+            roi_ttls.append(None)
+        else:
+            x1, y1, x2, y2 = window
+            inputs.append(image[y1:y2, x1:x2])
+            offsets.append((x1, y1))
+            roi_ttls.append(ttl)
+
+    results = model(inputs, conf=conf_thres, half=HALF_INFERENCE, verbose=False)
+
+    detections_per_crop: List[List[PlateDetection]] = []
+    roi_misses: List[int] = []
+
+    for i, (result, model_input) in enumerate(zip(results, inputs)):
+        detections = _parse_result(result, model_input)
+
+        off_x, off_y = offsets[i]
+        if off_x or off_y:
+            detections = [
+                PlateDetection(
+                    x=det.x + off_x,
+                    y=det.y + off_y,
+                    width=det.width,
+                    height=det.height,
+                    confidence=det.confidence,
+                )
+                for det in detections
+            ]
+
+        detections_per_crop.append(detections)
+
+        if roi_ttls[i] is not None and not detections:
+            roi_misses.append(i)
+
+    # ROI-промахи: номер ушёл из окна — сбрасываем кэш и перегоняем
+    # полные кропы вторым батчем
+    if roi_misses:
+        for i in roi_misses:
+            _plate_roi_cache.pop(track_ids[i], None)
+            roi_ttls[i] = None
+
+        retry_results = model(
+            [vehicle_images[i] for i in roi_misses],
+            conf=conf_thres,
+            half=HALF_INFERENCE,
+            verbose=False,
+        )
+        for i, result in zip(roi_misses, retry_results):
+            detections_per_crop[i] = _parse_result(result, vehicle_images[i])
+
+    # Лучшая находка каждого трека уходит в кэш: попадание в ROI
+    # декрементирует TTL, полный проход заводит его заново
+    for i, detections in enumerate(detections_per_crop):
+        track_id = track_ids[i]
+        if track_id is None or not detections:
+            continue
+
+        best = max(detections, key=lambda d: d.confidence)
+        ttl = roi_ttls[i]
+        if ttl is not None:
+            _cache_roi(track_id, best, ttl=ttl - 1)
+        else:
+            _cache_roi(track_id, best)
+
+    return detections_per_crop
+
+
+def _parse_result(result, vehicle_image: np.ndarray) -> List[PlateDetection]:
+    """
+    Разбирает боксы одного результата YOLO в список PlateDetection.
+    """
     h, w = vehicle_image.shape[:2]
-    result = model(vehicle_image, conf=conf_thres, verbose=False)[0]
     boxes = result.boxes
 
-    detections: List[PlateDetection] = []
+    n = len(boxes)
+    if n == 0:
+        return []
+
+    # Один перенос тензоров на CPU и колоночный clip вместо поэлементных
+    # box.xyxy[0]/box.conf[0] с синхронизацией на каждое обращение
+    confs = boxes.conf.cpu().numpy()
+    xyxy = boxes.xyxy.cpu().numpy()
 
-    for box in boxes:
-        x1, y1, x2, y2 = _xyxy_from_box(box)
+    x1s = np.clip(xyxy[:, 0].astype(np.int64), 0, w)
+    y1s = np.clip(xyxy[:, 1].astype(np.int64), 0, h)
+    x2s = np.clip(xyxy[:, 2].astype(np.int64), 0, w)
+    y2s = np.clip(xyxy[:, 3].astype(np.int64), 0, h)
 
-        x1_i = max(0, int(x1))
-        y1_i = max(0, int(y1))
-        x2_i = min(w, int(x2))
-        y2_i = min(h, int(y2))
+    detections: List[PlateDetection] = []
+
+    for i in range(n):
+        x1_i = int(x1s[i])
+        y1_i = int(y1s[i])
+        x2_i = int(x2s[i])
+        y2_i = int(y2s[i])
 
         if x2_i <= x1_i or y2_i <= y1_i:
             continue
 
-        conf = float(box.conf[0])
-
         detections.append(
             PlateDetection(
                 x=x1_i,
                 y=y1_i,
                 width=x2_i - x1_i,
                 height=y2_i - y1_i,
-                confidence=conf,
+                confidence=float(confs[i]),
             )
         )
 
     return detections
-
-
-def _xyxy_from_box(box) -> Tuple[float, float, float, float]:
-    x1 = float(box.xyxy[0][0])
-    y1 = float(box.xyxy[0][1])
-    x2 = float(box.xyxy[0][2])
-    y2 = float(box.xyxy[0][3])
-    return x1, y1, x2, y2
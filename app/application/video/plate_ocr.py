@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
 import cv2
 import numpy as np
 import pytesseract
 from PIL import Image
 
+# tesserocr держит LSTM-модель резидентной в процессе — без fork/exec
+# tesseract'а на каждый вызов. Опционален: без него работаем через
+# pytesseract (субпроцесс на вызов).
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 # Если tesseract не в PATH — раскомментируй и пропиши путь:
 # pytesseract.pytesseract.tesseract_cmd = "/usr/local/bin/tesseract"
 
@@ -30,6 +42,23 @@ RUS_TO_LAT_MAP = {
     "Х": "X",
 }
 
+# Единая таблица для str.translate: кириллица → латиница плюс типичные
+# OCR-путаницы (O/Q, I/L → 1, Z → 2, S → 5). Применяется одним
+# C-проходом вместо посимвольного Python-цикла.
+_PLATE_TRANSLATE = str.maketrans(
+    {
+        **RUS_TO_LAT_MAP,
+        "Q": "O",
+        "I": "1",
+        "L": "1",
+        "Z": "2",
+        "S": "5",
+    }
+)
+
+# Всё, что после транслитерации не входит в допустимый набор, вырезается
+_PLATE_JUNK_RE = re.compile(r"[^ABEKMHOPCTYX0-9]")
+
 
 @dataclass(frozen=True)
 class PlateOcrResult:
@@ -48,12 +77,56 @@ def recognize_plate_from_image(
     возвращает результат OCR и нормализованный номер (если удалось).
     """
     gray = _to_grayscale(image)
+
+    # Tesseract дорогой (запуск процесса + LSTM-инференс), поэтому на
+    # заведомо безнадёжных кропах его не запускаем: слишком мелких,
+    # почти однотонных или смазанных движением.
+    if not _is_plate_crop_ocr_worthy(gray):
+        return PlateOcrResult(raw_text="", normalized_plate=None)
+
     preprocessed = _preprocess_plate_image(gray)
     raw_text = _run_tesseract(preprocessed)
     normalized = normalize_plate_text(raw_text)
     return PlateOcrResult(raw_text=raw_text, normalized_plate=normalized)
 
 
+_OCR_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def _get_ocr_pool() -> ThreadPoolExecutor:
+    """
+    Ленивая инициализация пула OCR-потоков. Tesseract отпускает GIL на
+    время распознавания, так что кропы одного кадра реально идут
+    параллельно, а CPU-bound OCR перекрывается со следующей детекцией.
+    """
+    global _OCR_POOL
+
+    if _OCR_POOL is None:
+        _OCR_POOL = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1),
+            thread_name_prefix="plate-ocr",
+        )
+
+    return _OCR_POOL
+
+
+def recognize_plates_batch(
+    images: List[Image.Image | np.ndarray],
+) -> List[PlateOcrResult]:
+    """
+    Распознаёт пачку кропов номеров параллельно в пуле потоков.
+    Результаты выровнены по входу. Один кроп обрабатывается без пула.
+    """
+    if not images:
+        return []
+
+    if len(images) == 1:
+        return [recognize_plate_from_image(images[0])]
+
+    pool = _get_ocr_pool()
+    return list(pool.map(recognize_plate_from_image, images))
+
+
 def normalize_plate_text(text: str) -> Optional[str]:
     """
     Нормализует текст, полученный от OCR, в формат номера:
@@ -67,50 +140,10 @@ def normalize_plate_text(text: str) -> Optional[str]:
     if not text:
         return None
 
-    cleaned = []
-    upper = text.strip().upper()
-
-    for ch in upper:
-        if ch.isspace():
-            continue
-
-        # Цифры сразу пропускаем, если они валидные
-        if ch.isdigit():
-            cleaned.append(ch)
-            continue
-
-        # Кириллица → латиница, если есть в карте
-        if "А" <= ch <= "Я" or ch == "Ё":
-            mapped = RUS_TO_LAT_MAP.get(ch, None)
-            if mapped is None:
-                continue
-            ch = mapped
-
-        # Некоторые типичные OCR-путаницы:
-        if ch in {"O", "Q"}:
-            # Очень часто O/0 путаются, но мы не знаем контекст.
-            # Оставляем как букву O (в допустимом наборе).
-            ch = "O"
-        elif ch in {"I", "L"}:
-            # Часто I/L → 1
-            ch = "1"
-        elif ch == "Z":
-            # Иногда Z вместо 2
-            ch = "2"
-        elif ch == "S":
-            # S вместо 5
-            ch = "5"
-        elif ch == "B":
-            # B вместо 8 (но B есть и в алфавите номеров; оставляем как B)
-            ch = "B"
-
-        if ch in ALLOWED_PLATE_CHARS:
-            cleaned.append(ch)
-
-    if not cleaned:
-        return None
+    translated = text.upper().translate(_PLATE_TRANSLATE)
+    cleaned = _PLATE_JUNK_RE.sub("", translated)
 
-    return "".join(cleaned)
+    return cleaned or None
 
 
 # ==============================
@@ -118,12 +151,51 @@ def normalize_plate_text(text: str) -> Optional[str]:
 # ==============================
 
 
+# Выше этой высоты кроп номера перед OCR всё равно уменьшается
+_MAX_PLATE_HEIGHT = 160
+
+# Пороги отсечки мусорных кропов перед OCR
+_MIN_PLATE_AREA = 400          # меньше ~20x20 — символы не прочитать
+_MIN_PLATE_STD = 12.0          # почти однотонный патч (нет текста)
+_MIN_LAPLACIAN_VAR = 50.0      # сильно смазанный кроп
+
+
+def _is_plate_crop_ocr_worthy(gray: np.ndarray) -> bool:
+    """
+    Быстрые проверки, что на кропе в принципе может быть читаемый номер.
+    Все три — на порядки дешевле запуска Tesseract.
+    """
+    h, w = gray.shape[:2]
+    if h * w < _MIN_PLATE_AREA:
+        return False
+
+    if float(gray.std()) < _MIN_PLATE_STD:
+        return False
+
+    # Дисперсия лапласиана — стандартная метрика резкости
+    if float(cv2.Laplacian(gray, cv2.CV_32F).var()) < _MIN_LAPLACIAN_VAR:
+        return False
+
+    return True
+
+
 def _to_grayscale(image: Image.Image | np.ndarray) -> np.ndarray:
     """
     Приводит входное изображение к grayscale np.ndarray (uint8).
     Поддерживает вход в формате PIL.Image или np.ndarray (BGR/GRAY).
+
+    Слишком крупные кропы уменьшаются до _MAX_PLATE_HEIGHT ещё в цвете:
+    конвертация после уменьшения трогает в разы меньше байт, чем
+    конвертация полного кадра с последующим уменьшением.
     """
     if isinstance(image, Image.Image):
+        w, h = image.size
+        if h > _MAX_PLATE_HEIGHT:
+            scale = _MAX_PLATE_HEIGHT / float(h)
+            image = image.resize(
+                (max(int(w * scale), 1), _MAX_PLATE_HEIGHT),
+                Image.BILINEAR,
+            )
         # PIL → grayscale
         return np.array(image.convert("L"))
 
@@ -132,6 +204,14 @@ def _to_grayscale(image: Image.Image | np.ndarray) -> np.ndarray:
         return image
 
     if len(image.shape) == 3:
+        h, w = image.shape[:2]
+        if h > _MAX_PLATE_HEIGHT:
+            scale = _MAX_PLATE_HEIGHT / float(h)
+            image = cv2.resize(
+                image,
+                (max(int(w * scale), 1), _MAX_PLATE_HEIGHT),
+                interpolation=cv2.INTER_AREA,
+            )
         # BGR → GRAY
         return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
@@ -152,37 +232,84 @@ def _preprocess_plate_image(gray: np.ndarray) -> np.ndarray:
     if h < target_height:
         scale = target_height / float(h)
         new_w = int(w * scale)
-        gray = cv2.resize(gray, (new_w, target_height), interpolation=cv2.INTER_CUBIC)
+        # INTER_LINEAR вместо INTER_CUBIC: в разы дешевле, а Tesseract
+        # от кубической интерполяции ничего не выигрывает
+        gray = cv2.resize(gray, (new_w, target_height), interpolation=cv2.INTER_LINEAR)
 
-    # Если номер слишком огромный — можно чуть уменьшить (не обязательно)
-    max_height = 160
+    # Если номер слишком огромный — можно чуть уменьшить (не обязательно).
+    # Обычно уже no-op: _to_grayscale уменьшает крупные кропы ещё в цвете.
     h2, w2 = gray.shape[:2]
-    if h2 > max_height:
-        scale = max_height / float(h2)
+    if h2 > _MAX_PLATE_HEIGHT:
+        scale = _MAX_PLATE_HEIGHT / float(h2)
         new_w = int(w2 * scale)
-        gray = cv2.resize(gray, (new_w, max_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.resize(gray, (new_w, _MAX_PLATE_HEIGHT), interpolation=cv2.INTER_AREA)
 
     return gray
 
 
+_TESS_WHITELIST = "ABEKMHOPCTYXабекмнорстухАВЕКМНОРСТУХ0123456789"
+
+# По одному резидентному API на поток: PyTessBaseAPI не потокобезопасен,
+# а отдельные экземпляры позволяют пулу OCR-потоков работать без замка
+_TESS_LOCAL = threading.local()
+_WARNED_NO_TESSEROCR = False
+
+
+def _get_tess_api():
+    """
+    Ленивая инициализация резидентного Tesseract API (tesserocr)
+    для текущего потока.
+    """
+    api = getattr(_TESS_LOCAL, "api", None)
+
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(
+            lang="rus+eng",
+            psm=tesserocr.PSM.SINGLE_LINE,
+            oem=tesserocr.OEM.LSTM_ONLY,
+        )
+        api.SetVariable("tessedit_char_whitelist", _TESS_WHITELIST)
+        _TESS_LOCAL.api = api
+
+    return api
+
+
 def _run_tesseract(image: np.ndarray) -> str:
     """
     Запускает Tesseract на уже подготовленном изображении.
 
+    Предпочитаем tesserocr: модель загружается один раз и живёт
+    в процессе, вызов — без fork/exec. Фолбэк — pytesseract
+    (субпроцесс на каждый вызов).
+
     Конфигурация:
-    - --psm 7: одна строка текста (под номер отлично подходит)
-    - --oem 3: LSTM
+    - psm 7 (SINGLE_LINE): одна строка текста (под номер отлично подходит)
+    - oem 3 / LSTM
     - whitelist: только допустимые для номера символы
     """
-    pil_img = Image.fromarray(image)
-
-    whitelist = "ABEKMHOPCTYXабекмнорстухАВЕКМНОРСТУХ0123456789"
-    config = (
-        "--oem 3 "
-        "--psm 7 "
-        f"-c tessedit_char_whitelist={whitelist}"
-    )
-
-    raw = pytesseract.image_to_string(pil_img, lang="rus+eng", config=config)
+    global _WARNED_NO_TESSEROCR
+
+    if tesserocr is not None:
+        api = _get_tess_api()
+        # Серый uint8 отдаём напрямую байтами — без PIL-обёртки
+        # и лишнего копирования пикселей
+        h, w = image.shape[:2]
+        api.SetImageBytes(np.ascontiguousarray(image).tobytes(), w, h, 1, w)
+        raw = api.GetUTF8Text()
+    else:
+        if not _WARNED_NO_TESSEROCR:
+            print(
+                "[WARN] tesserocr not installed, "
+                "falling back to pytesseract subprocess per OCR call"
+            )
+            _WARNED_NO_TESSEROCR = True
+
+        config = (
+            "--oem 3 "
+            "--psm 7 "
+            f"-c tessedit_char_whitelist={_TESS_WHITELIST}"
+        )
+        # pytesseract принимает ndarray напрямую — PIL-обёртка не нужна
+        raw = pytesseract.image_to_string(image, lang="rus+eng", config=config)
 
     return raw.replace("\n", " ").replace("\x0c", " ").strip()
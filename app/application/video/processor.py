@@ -1,23 +1,27 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
+import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Mapping, Optional, Sequence, Callable, Awaitable
-from uuid import uuid4
 
+import cv2
 import numpy as np
 
-from app.application.video.frame_iterator import RawFrame, TARGET_FPS, iter_video_frames
+from app.config import DB_FLUSH_EVERY_FRAMES, EMBED_BATCH_FRAMES
+from app.application.video.frame_iterator import RawFrame, TARGET_FPS, aiter_video_frames
 from app.application.video.object_detector import (
     DetectedObject,
     DetectedObjectCategory,
     detect_objects_on_frame,
 )
+from app.application.video.detector_tracker import DetectorTrackerPipeline
 from app.application.video.plate_detector import (
     PlateDetection,
-    detect_plates_on_vehicle,
+    detect_plates_on_vehicles,
 )
 from app.application.video.car_color_extractor import (
     CarColorProfile,
@@ -25,7 +29,7 @@ from app.application.video.car_color_extractor import (
 )
 from app.application.video.plate_ocr import (
     PlateOcrResult,
-    recognize_plate_from_image,
+    recognize_plates_batch,
 )
 from app.application.video.person_color_extractor import (
     PersonColorProfile,
@@ -33,8 +37,8 @@ from app.application.video.person_color_extractor import (
     extract_person_color_profile,
 )
 from app.application.embeddings.ruclip_embedder import (
-    embed_frame_from_raw,
-    embed_object_on_frame,
+    embed_frames_from_raw,
+    embed_objects_on_frame,
 )
 
 from app.domain.frame import Frame
@@ -47,6 +51,7 @@ from app.domain.value_objects import (
     ObjectType,
     PersonAttrsId,
     TransportAttrsId,
+    new_uuid_str,
 )
 
 from app.infrastructure.db.postgres import PostgresDatabase, load_config_from_env
@@ -60,6 +65,16 @@ from app.infrastructure.repositories import (
 
 ProgressCallback = Callable[[float], Awaitable[None]]
 
+logger = logging.getLogger(__name__)
+
+# Пороги, ниже которых атрибуты (цвет/номер/одежда) не считаем: на
+# крошечных или неуверенных боксах OCR не срабатывает, а цветовая
+# статистика — шум. Сам Object при этом сохраняется (нужен для
+# трекинга и поиска), атрибуты пишутся пустыми.
+_MIN_ATTRS_CONF = 0.3
+_MIN_TRANSPORT_ATTRS_AREA = 64 * 64
+_MIN_PERSON_ATTRS_AREA = 48 * 96
+
 @dataclass(frozen=True)
 class TimeRange:
     """
@@ -108,6 +123,11 @@ class FrameTimeMapper:
             total += dur
             self._prefix_sums.append(total)
 
+        # Копия префиксных сумм для векторного map_many
+        self._prefix_sums_arr: np.ndarray = np.asarray(
+            self._prefix_sums, dtype=np.float64,
+        )
+
         self.total_duration_sec: float = total
         self._warned_overflow: bool = False
 
@@ -123,26 +143,55 @@ class FrameTimeMapper:
         # Хвост, когда видео чуть длиннее суммы ranges.
         if fragment_sec >= self.total_duration_sec:
             if not self._warned_overflow:
-                print(
-                    "[WARN] frame timestamp is slightly beyond total ranges duration: "
-                    f"{fragment_sec:.3f} > {self.total_duration_sec:.3f}. "
-                    "Mapping to the end of the last range."
+                logger.warning(
+                    "frame timestamp is slightly beyond total ranges duration: "
+                    "%.3f > %.3f. Mapping to the end of the last range.",
+                    fragment_sec,
+                    self.total_duration_sec,
                 )
                 self._warned_overflow = True
 
             return self._ranges[-1].end_at
 
-        # Ищем диапазон, в который попадает fragment_sec
-        prev_sum = 0.0
-        for idx, s in enumerate(self._prefix_sums):
-            if fragment_sec < s:
-                r = self._ranges[idx]
-                offset = fragment_sec - prev_sum
-                return r.start_at + timedelta(seconds=offset)
-            prev_sum = s
+        # Префиксные суммы возрастают — нужный диапазон находится
+        # бинарным поиском (C-реализация bisect) вместо линейного скана
+        idx = bisect.bisect_right(self._prefix_sums, fragment_sec)
+        if idx >= len(self._ranges):
+            # Теоретически не должны сюда попасть, но на всякий случай
+            return self._ranges[-1].end_at
+
+        prev_sum = self._prefix_sums[idx - 1] if idx > 0 else 0.0
+        offset = fragment_sec - prev_sum
+        return self._ranges[idx].start_at + timedelta(seconds=offset)
+
+    def map_many(self, fragment_secs: Sequence[float]) -> list[datetime]:
+        """
+        Векторное отображение пачки timestamp'ов: все диапазоны находятся
+        одним np.searchsorted, по-питоновски остаётся только сборка
+        datetime'ов.
+        """
+        if len(fragment_secs) == 0:
+            return []
 
-        # Теоретически не должны сюда попасть, но на всякий случай
-        return self._ranges[-1].end_at
+        secs = np.clip(
+            np.asarray(fragment_secs, dtype=np.float64),
+            0.0,
+            None,
+        )
+        indices = np.searchsorted(self._prefix_sums_arr, secs, side="right")
+
+        result: list[datetime] = []
+        for sec, idx in zip(secs.tolist(), indices.tolist()):
+            if idx >= len(self._ranges):
+                result.append(self._ranges[-1].end_at)
+                continue
+
+            prev_sum = self._prefix_sums[idx - 1] if idx > 0 else 0.0
+            result.append(
+                self._ranges[idx].start_at + timedelta(seconds=sec - prev_sum),
+            )
+
+        return result
 
     def map_to_iso(self, fragment_sec: float) -> str:
         return self.map_to_datetime(fragment_sec).isoformat()
@@ -209,7 +258,7 @@ async def process_video(
         person_attrs_repo = PersonAttributesPostgresRepository(db)
         embedding_repo = EmbeddingPostgresRepository(db)
 
-        print("=== Video processing started ===")
+        logger.info("=== Video processing started ===")
 
         # Оценка общего числа кадров (для прогресса)
         estimated_total_frames = int(time_mapper.total_duration_sec * TARGET_FPS)
@@ -226,7 +275,116 @@ async def process_video(
         total_transport_attrs_saved = 0
         total_person_attrs_saved = 0
 
-        for raw in iter_video_frames(video_source, TARGET_FPS):
+        # Буферы батчевых вставок: каждая строка по отдельности — это
+        # полный round-trip до Postgres (+ fsync на автокоммите); копим
+        # и сбрасываем раз в DB_FLUSH_EVERY_FRAMES кадров одним
+        # executemany на таблицу.
+        frames_buf: list[Frame] = []
+        objects_buf: list[DomainObject] = []
+        embeddings_buf: list = []
+        transport_attrs_buf: list[TransportAttributes] = []
+        person_attrs_buf: list[PersonAttributes] = []
+
+        async def _flush_buffers(
+            frames: list[Frame],
+            objects: list[DomainObject],
+            embeddings: list,
+            transport_attrs: list[TransportAttributes],
+            person_attrs: list[PersonAttributes],
+        ) -> None:
+            nonlocal total_objects_saved, total_embeddings_saved
+            nonlocal total_transport_attrs_saved, total_person_attrs_saved
+
+            # Порядок сброса важен: frames -> objects -> embeddings ->
+            # attrs, чтобы внешние ключи ссылались на уже вставленные
+            # строки. Кадры и объекты — «скелет» данных, их ошибки
+            # фатальны (как и раньше при вставке по одной строке).
+            await frame_repo.create_many(frames)
+
+            await object_repo.create_many(objects)
+            total_objects_saved += len(objects)
+
+            try:
+                await embedding_repo.create_many(embeddings)
+                total_embeddings_saved += len(embeddings)
+            except Exception:
+                logger.warning("embeddings batch insert failed", exc_info=True)
+
+            try:
+                await transport_attrs_repo.create_many(transport_attrs)
+                total_transport_attrs_saved += len(transport_attrs)
+            except Exception:
+                logger.warning("transport attrs batch insert failed", exc_info=True)
+
+            try:
+                await person_attrs_repo.create_many(person_attrs)
+                total_person_attrs_saved += len(person_attrs)
+            except Exception:
+                logger.warning("person attrs batch insert failed", exc_info=True)
+
+        def _take_buffers() -> tuple:
+            """
+            Забирает накопленные буферы и подставляет на их место пустые.
+            """
+            nonlocal frames_buf, objects_buf, embeddings_buf
+            nonlocal transport_attrs_buf, person_attrs_buf
+
+            taken = (
+                frames_buf,
+                objects_buf,
+                embeddings_buf,
+                transport_attrs_buf,
+                person_attrs_buf,
+            )
+            frames_buf = []
+            objects_buf = []
+            embeddings_buf = []
+            transport_attrs_buf = []
+            person_attrs_buf = []
+            return taken
+
+        # Сброс в БД запускаем фоновой задачей: пока asyncpg гоняет
+        # батчи по сети, тяжёлые стадии следующих кадров (YOLO, ruCLIP)
+        # крутятся в worker-потоке через asyncio.to_thread — GPU/CPU и
+        # БД перекрываются вместо последовательной работы. Глубина
+        # конвейера — один незавершённый сброс.
+        pending_flush: Optional[asyncio.Task] = None
+
+        # Микробатч для эмбеддингов кадров: один forward ruCLIP на
+        # EMBED_BATCH_FRAMES кадров вместо форварда на каждый кадр —
+        # накладные расходы диспатча размазываются по батчу.
+        embed_batch: list[tuple[RawFrame, Frame]] = []
+
+        async def _drain_embed_batch() -> None:
+            if not embed_batch:
+                return
+
+            try:
+                frame_embeddings = await asyncio.to_thread(
+                    embed_frames_from_raw,
+                    [r for r, _ in embed_batch],
+                    [f.id for _, f in embed_batch],
+                )
+                embeddings_buf.extend(frame_embeddings)
+            except Exception as exc:
+                logger.warning("frame embeddings batch failed: %s", exc)
+
+            embed_batch.clear()
+
+        # Гибрид «детекция + трекинг»: полная YOLO-детекция раз в
+        # DETECT_EVERY_N_FRAMES кадров, между ними боксы ведут лёгкие
+        # OpenCV-трекеры. Если сборка OpenCV без API трекеров —
+        # откатываемся на полную детекцию на каждом кадре.
+        detector_tracker: Optional[DetectorTrackerPipeline]
+        try:
+            detector_tracker = DetectorTrackerPipeline(conf_thres=0.25)
+        except RuntimeError as exc:
+            logger.warning(
+                "tracker API unavailable, detecting every frame: %s", exc,
+            )
+            detector_tracker = None
+
+        async for raw in aiter_video_frames(video_source, TARGET_FPS):
             processed_frames += 1
             total_frames += 1
 
@@ -239,8 +397,8 @@ async def process_video(
                     frac = 1.0
                 try:
                     await progress_cb(frac)
-                except Exception as exc:
-                    print(f"[WARN] progress callback failed: {exc}")
+                except Exception:
+                    logger.warning("progress callback failed", exc_info=True)
 
             # 1. Сохраняем кадр
             frame = _raw_frame_to_frame_entity(
@@ -249,24 +407,30 @@ async def process_video(
                 time_mapper=time_mapper,
             )
 
-            print(frame)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s", frame)
 
-            await frame_repo.create(frame)
+            frames_buf.append(frame)
 
-            # 2. Эмбеддинг кадра
-            try:
-                frame_embedding = embed_frame_from_raw(raw, frame.id)
-                await embedding_repo.create(frame_embedding)
-                total_embeddings_saved += 1
-            except Exception as exc:
-                print(f"[WARN] frame embedding failed for frame {frame.id}: {exc}")
+            # 2. Эмбеддинг кадра: копим кадры и считаем эмбеддинги
+            # одним батчем раз в EMBED_BATCH_FRAMES кадров
+            embed_batch.append((raw, frame))
+            if len(embed_batch) >= EMBED_BATCH_FRAMES:
+                await _drain_embed_batch()
 
-            # 3. Детекция объектов
-            detections = detect_objects_on_frame(
-                raw,
-                conf_thres=0.25,
-                use_tracking=True,
-            )
+            # 3. Детекция объектов: раз в N кадров — полная YOLO,
+            # между ними боксы ведут лёгкие трекеры
+            if detector_tracker is not None:
+                detections = await asyncio.to_thread(
+                    detector_tracker.process_frame, raw,
+                )
+            else:
+                detections = await asyncio.to_thread(
+                    detect_objects_on_frame,
+                    raw,
+                    conf_thres=0.25,
+                    use_tracking=True,
+                )
 
             # 4. Маппим YOLO-детекции в доменные Object
             det_obj_pairs: list[tuple[DetectedObject, DomainObject]] = []
@@ -274,18 +438,22 @@ async def process_video(
                 obj = _detected_to_domain_object(det, frame.id)
                 det_obj_pairs.append((det, obj))
 
-            # 5. Сохраняем объекты + эмбеддинги объектов
-            for det, obj in det_obj_pairs:
-                await object_repo.create(obj)
-                total_objects_saved += 1
+            # 5. Копим объекты + эмбеддинги объектов в буферы.
+            # Эмбеддинги считаем одним батчем на кадр — один forward
+            # через ruCLIP вместо N форвардов по одному кропу.
+            objects_buf.extend(obj for _, obj in det_obj_pairs)
 
+            if det_obj_pairs:
                 try:
-                    obj_embedding = embed_object_on_frame(raw.image, obj)
-                    await embedding_repo.create(obj_embedding)
-                    total_embeddings_saved += 1
+                    obj_embeddings = await asyncio.to_thread(
+                        embed_objects_on_frame,
+                        raw.image,
+                        [obj for _, obj in det_obj_pairs],
+                    )
+                    embeddings_buf.extend(obj_embeddings)
                 except Exception as exc:
-                    print(
-                        f"[WARN] object embedding failed for object {obj.id}: {exc}",
+                    logger.warning(
+                        "object embeddings failed for frame %s: %s", frame.id, exc,
                     )
 
             persons_on_frame = sum(
@@ -300,22 +468,86 @@ async def process_video(
             total_persons += persons_on_frame
             total_transport += transport_on_frame
 
-            # 6. Обработка TRANSPORT / PERSON для атрибутов
+            # 6. Обработка TRANSPORT / PERSON для атрибутов.
+            # Мелкие и неуверенные боксы атрибутный конвейер пропускают
+            # целиком (см. _attrs_worthy): на спорном трафике это
+            # снимает заметную долю вызовов цвета/OCR.
+            attrs_worthy = [_attrs_worthy(det) for det, _ in det_obj_pairs]
+
+            # HSV всего кадра считаем один раз: кропы для цветовых
+            # профилей берутся view-срезами из него вместо cvtColor
+            # на каждый кроп (конвертация memory-bound, на людных
+            # кадрах это кратно меньше трафика).
+            frame_hsv: Optional[np.ndarray] = None
+            if any(attrs_worthy):
+                frame_hsv = await asyncio.to_thread(
+                    cv2.cvtColor, raw.image, cv2.COLOR_BGR2HSV,
+                )
+
+            # Кламп всех bbox'ов кадра одним np.clip по столбцам вместо
+            # питоновских max/min на каждый объект
+            if det_obj_pairs:
+                frame_h, frame_w = raw.image.shape[:2]
+                clamped_boxes = _clamp_bboxes_np(
+                    [
+                        (det.bbox.x, det.bbox.y, det.bbox.width, det.bbox.height)
+                        for det, _ in det_obj_pairs
+                    ],
+                    frame_h,
+                    frame_w,
+                )
+
+            # Номера ищем одним батчем на кадр — один forward модели
+            # номеров на все ТС кадра вместо вызова на каждый кроп.
+            transport_crops = [
+                _crop_from_clamped(raw.image, clamped_boxes[i])
+                for i, (det, _) in enumerate(det_obj_pairs)
+                if det.category == DetectedObjectCategory.TRANSPORT
+                and attrs_worthy[i]
+            ]
+            # HSV-кропы теми же границами, что и BGR (без копий)
+            transport_crops_hsv = [
+                _crop_from_clamped(frame_hsv, clamped_boxes[i])
+                for i, (det, _) in enumerate(det_obj_pairs)
+                if det.category == DetectedObjectCategory.TRANSPORT
+                and attrs_worthy[i]
+            ]
+            # track_id тех же ТС (выровнен по transport_crops): детектор
+            # номеров кэширует ROI прошлой находки по треку и ищет в
+            # маленьком окне вместо полного кропа
+            transport_track_ids = [
+                det.track_id
+                for i, (det, _) in enumerate(det_obj_pairs)
+                if det.category == DetectedObjectCategory.TRANSPORT
+                and attrs_worthy[i]
+            ]
+            plates_per_crop = await asyncio.to_thread(
+                _safe_detect_plates_on_crops,
+                transport_crops,
+                transport_track_ids,
+            )
+            plate_ocr_per_crop = await asyncio.to_thread(
+                _safe_ocr_best_plates,
+                transport_crops,
+                plates_per_crop,
+            )
+
             person_index = 0
             transport_index = 0
 
-            for det, obj in det_obj_pairs:
+            for det_index, (det, obj) in enumerate(det_obj_pairs):
                 if det.category == DetectedObjectCategory.TRANSPORT:
-                    car_crop = _crop_from_bbox(
-                        raw.image,
-                        det.bbox.x,
-                        det.bbox.y,
-                        det.bbox.width,
-                        det.bbox.height,
-                    )
+                    color_profile = None
+                    plate_ocr_result = None
+
+                    if attrs_worthy[det_index]:
+                        car_crop = transport_crops[transport_index]
 
-                    color_profile = _safe_extract_car_color(car_crop)
-                    plate_ocr_result = _safe_detect_and_ocr_plate(car_crop)
+                        color_profile = _safe_extract_car_color(
+                            car_crop,
+                            transport_crops_hsv[transport_index],
+                        )
+                        plate_ocr_result = plate_ocr_per_crop[transport_index]
 
                     color_str = _color_profile_to_hsv_string(color_profile) or ""
                     plate_norm = (
@@ -324,40 +556,44 @@ async def process_video(
                         else None
                     )
 
-                    try:
-                        transport_attrs = TransportAttributes(
-                            id=TransportAttrsId(str(uuid4())),
+                    transport_attrs_buf.append(
+                        TransportAttributes(
+                            id=TransportAttrsId(new_uuid_str()),
                             object_id=obj.id,
                             color_hsv=color_str,
                             license_plate=plate_norm,
                         )
-                        await transport_attrs_repo.create(transport_attrs)
-                        total_transport_attrs_saved += 1
-                    except Exception as exc:
-                        print(
-                            f"[WARN] transport attrs save failed for object {obj.id}: {exc}",
-                        )
-
-                    _log_transport_analysis(
-                        raw=raw,
-                        det=det,
-                        transport_index=transport_index,
-                        color_profile=color_profile,
-                        plate_result=plate_ocr_result,
                     )
 
-                    transport_index += 1
+                    if logger.isEnabledFor(logging.DEBUG):
+                        _log_transport_analysis(
+                            raw=raw,
+                            det=det,
+                            transport_index=transport_index,
+                            color_profile=color_profile,
+                            plate_result=plate_ocr_result,
+                        )
+
+                    if attrs_worthy[det_index]:
+                        transport_index += 1
 
                 elif det.category == DetectedObjectCategory.PERSON:
-                    person_crop = _crop_from_bbox(
-                        raw.image,
-                        det.bbox.x,
-                        det.bbox.y,
-                        det.bbox.width,
-                        det.bbox.height,
-                    )
+                    person_colors = None
 
-                    person_colors = _safe_extract_person_color(person_crop)
+                    if attrs_worthy[det_index]:
+                        person_crop = _crop_from_clamped(
+                            raw.image,
+                            clamped_boxes[det_index],
+                        )
+                        person_crop_hsv = _crop_from_clamped(
+                            frame_hsv,
+                            clamped_boxes[det_index],
+                        )
+
+                        person_colors = _safe_extract_person_color(
+                            person_crop,
+                            person_crop_hsv,
+                        )
 
                     upper_str = _region_color_to_hsv_string(
                         person_colors.upper_color if person_colors else None,
@@ -366,27 +602,23 @@ async def process_video(
                         person_colors.lower_color if person_colors else None,
                     )
 
-                    try:
-                        person_attrs = PersonAttributes(
-                            id=PersonAttrsId(str(uuid4())),
+                    person_attrs_buf.append(
+                        PersonAttributes(
+                            id=PersonAttrsId(new_uuid_str()),
                             object_id=obj.id,
                             upper_color_hsv=upper_str,
                             lower_color_hsv=lower_str,
                         )
-                        await person_attrs_repo.create(person_attrs)
-                        total_person_attrs_saved += 1
-                    except Exception as exc:
-                        print(
-                            f"[WARN] person attrs save failed for object {obj.id}: {exc}",
-                        )
-
-                    _log_person_analysis(
-                        raw=raw,
-                        det=det,
-                        person_index=person_index,
-                        profile=person_colors,
                     )
 
+                    if logger.isEnabledFor(logging.DEBUG):
+                        _log_person_analysis(
+                            raw=raw,
+                            det=det,
+                            person_index=person_index,
+                            profile=person_colors,
+                        )
+
                     person_index += 1
 
             # 7. Сводный лог по кадру
@@ -399,14 +631,31 @@ async def process_video(
                     transport_on_frame=transport_on_frame,
                 )
 
-        print("=== Video processing finished ===")
-        print(f"  Frames processed                : {total_frames}")
-        print(f"  Objects saved (total)           : {total_objects_saved}")
-        print(f"  Embeddings saved (frame+object) : {total_embeddings_saved}")
-        print(f"    Persons detected              : {total_persons}")
-        print(f"    Transport detected            : {total_transport}")
-        print(f"  TransportAttributes saved       : {total_transport_attrs_saved}")
-        print(f"  PersonAttributes saved          : {total_person_attrs_saved}")
+            # 8. Периодический сброс накопленных вставок: дожидаемся
+            # предыдущего сброса (ограничиваем конвейер одним батчем
+            # в полёте) и запускаем новый фоном, не блокируя цикл.
+            if processed_frames % DB_FLUSH_EVERY_FRAMES == 0:
+                await _drain_embed_batch()
+                if pending_flush is not None:
+                    await pending_flush
+                pending_flush = asyncio.create_task(
+                    _flush_buffers(*_take_buffers()),
+                )
+
+        # Хвост, не дотянувший до полного батча
+        await _drain_embed_batch()
+        if pending_flush is not None:
+            await pending_flush
+        await _flush_buffers(*_take_buffers())
+
+        logger.info("=== Video processing finished ===")
+        logger.info("  Frames processed                : %d", total_frames)
+        logger.info("  Objects saved (total)           : %d", total_objects_saved)
+        logger.info("  Embeddings saved (frame+object) : %d", total_embeddings_saved)
+        logger.info("    Persons detected              : %d", total_persons)
+        logger.info("    Transport detected            : %d", total_transport)
+        logger.info("  TransportAttributes saved       : %d", total_transport_attrs_saved)
+        logger.info("  PersonAttributes saved          : %d", total_person_attrs_saved)
 
     finally:
         await db.close()
@@ -421,7 +670,7 @@ def _raw_frame_to_frame_entity(
     Строит доменную сущность Frame из сырого кадра + маппера времени.
     """
     return Frame(
-        id=FrameId(str(uuid4())),
+        id=FrameId(new_uuid_str()),
         timestamp_sec=raw.timestamp_sec,
         source_id=source_id,
         at=time_mapper.map_to_iso(raw.timestamp_sec),
@@ -447,7 +696,7 @@ def _detected_to_domain_object(
     )
 
     return DomainObject(
-        id=ObjectId(str(uuid4())),
+        id=ObjectId(new_uuid_str()),
         frame_id=frame_id,
         type=obj_type,
         bbox=bbox,
@@ -455,6 +704,55 @@ def _detected_to_domain_object(
     )
 
 
+def _attrs_worthy(det: DetectedObject) -> bool:
+    """
+    Стоит ли считать атрибуты (цвет/номер/одежду) для детекции.
+
+    Объект при отрицательном ответе всё равно сохраняется — скип
+    касается только атрибутного конвейера.
+    """
+    if det.confidence < _MIN_ATTRS_CONF:
+        return False
+
+    area = det.bbox.width * det.bbox.height
+    if det.category == DetectedObjectCategory.TRANSPORT:
+        return area >= _MIN_TRANSPORT_ATTRS_AREA
+
+    return area >= _MIN_PERSON_ATTRS_AREA
+
+
+def _clamp_bboxes_np(
+    bboxes: Sequence[tuple[int, int, int, int]],
+    height: int,
+    width: int,
+) -> np.ndarray:
+    """
+    Кламп пачки bbox'ов (x, y, w, h) к границам кадра одним np.clip
+    по столбцам. Возвращает целочисленный (K, 4)-массив x1, y1, x2, y2;
+    вырожденные боксы остаются с x2 <= x1 / y2 <= y1, их отсеивает
+    _crop_from_clamped.
+    """
+    xywh = np.asarray(bboxes, dtype=np.int64).reshape(-1, 4)
+
+    clamped = np.empty_like(xywh)
+    clamped[:, 0] = np.clip(xywh[:, 0], 0, width)
+    clamped[:, 1] = np.clip(xywh[:, 1], 0, height)
+    clamped[:, 2] = np.clip(xywh[:, 0] + xywh[:, 2], 0, width)
+    clamped[:, 3] = np.clip(xywh[:, 1] + xywh[:, 3], 0, height)
+    return clamped
+
+
+def _crop_from_clamped(image: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """
+    View-кроп по уже клампнутому боксу (x1, y1, x2, y2).
+    """
+    x1, y1, x2, y2 = box
+    if x2 <= x1 or y2 <= y1:
+        return image[0:0, 0:0]
+
+    return image[y1:y2, x1:x2]
+
+
 def _crop_from_bbox(
     image: np.ndarray,
     x: int,
@@ -475,58 +773,111 @@ def _crop_from_bbox(
     return image[y1:y2, x1:x2]
 
 
-def _safe_extract_car_color(car_crop: np.ndarray) -> Optional[CarColorProfile]:
+def _safe_extract_car_color(
+    car_crop: np.ndarray,
+    car_crop_hsv: Optional[np.ndarray] = None,
+) -> Optional[CarColorProfile]:
     if car_crop.size == 0:
         return None
 
     try:
-        return extract_car_hsv_profile(car_crop)
+        return extract_car_hsv_profile(car_crop, hsv_crop=car_crop_hsv)
     except Exception as exc:
-        print(f"[WARN] car color extraction failed: {exc}")
+        logger.warning("car color extraction failed: %s", exc)
         return None
 
 
-def _safe_detect_and_ocr_plate(car_crop: np.ndarray) -> Optional[PlateOcrResult]:
-    if car_crop.size == 0:
-        return None
+def _safe_detect_plates_on_crops(
+    car_crops: list[np.ndarray],
+    track_ids: Optional[list[Optional[int]]] = None,
+) -> list[list[PlateDetection]]:
+    """
+    Батчевая детекция номеров на кропах ТС одного кадра.
+    Результат выровнен по входу; для пустых кропов (и при ошибке
+    детекции) возвращаются пустые списки. track_ids (выровнен по
+    car_crops) включает ROI-кэш детектора по трекам.
+    """
+    detections_per_crop: list[list[PlateDetection]] = [[] for _ in car_crops]
+
+    if track_ids is None:
+        track_ids = [None] * len(car_crops)
+
+    non_empty = [(i, crop) for i, crop in enumerate(car_crops) if crop.size > 0]
+    if not non_empty:
+        return detections_per_crop
 
     try:
-        plate_detections = detect_plates_on_vehicle(car_crop, conf_thres=0.25)
+        batch_detections = detect_plates_on_vehicles(
+            [crop for _, crop in non_empty],
+            conf_thres=0.25,
+            track_ids=[track_ids[i] for i, _ in non_empty],
+        )
     except Exception as exc:
-        print(f"[WARN] plate detection failed: {exc}")
-        return None
+        logger.warning("plate detection failed: %s", exc)
+        return detections_per_crop
 
-    if not plate_detections:
-        return None
+    for (i, _), detections in zip(non_empty, batch_detections):
+        detections_per_crop[i] = detections
 
-    best_plate: PlateDetection = max(plate_detections, key=lambda d: d.confidence)
+    return detections_per_crop
 
-    plate_crop = _crop_from_bbox(
-        car_crop,
-        best_plate.x,
-        best_plate.y,
-        best_plate.width,
-        best_plate.height,
-    )
 
-    if plate_crop.size == 0:
-        return None
+def _safe_ocr_best_plates(
+    car_crops: list[np.ndarray],
+    detections_per_crop: list[list[PlateDetection]],
+) -> list[Optional[PlateOcrResult]]:
+    """
+    OCR лучших номеров всех ТС кадра одной параллельной пачкой.
+    Результат выровнен по входу; для кропов без детекций — None.
+    """
+    results: list[Optional[PlateOcrResult]] = [None] * len(car_crops)
+
+    pending: list[tuple[int, np.ndarray]] = []
+    for i, (car_crop, detections) in enumerate(
+        zip(car_crops, detections_per_crop)
+    ):
+        if not detections:
+            continue
+
+        best_plate = max(detections, key=lambda d: d.confidence)
+        plate_crop = _crop_from_bbox(
+            car_crop,
+            best_plate.x,
+            best_plate.y,
+            best_plate.width,
+            best_plate.height,
+        )
+        if plate_crop.size == 0:
+            continue
+
+        pending.append((i, plate_crop))
+
+    if not pending:
+        return results
 
     try:
-        return recognize_plate_from_image(plate_crop)
+        ocr_results = recognize_plates_batch([crop for _, crop in pending])
     except Exception as exc:
-        print(f"[WARN] plate OCR failed: {exc}")
-        return None
+        logger.warning("plate OCR failed: %s", exc)
+        return results
+
+    for (i, _), ocr_result in zip(pending, ocr_results):
+        results[i] = ocr_result
+
+    return results
 
 
-def _safe_extract_person_color(person_crop: np.ndarray) -> Optional[PersonColorProfile]:
+def _safe_extract_person_color(
+    person_crop: np.ndarray,
+    person_crop_hsv: Optional[np.ndarray] = None,
+) -> Optional[PersonColorProfile]:
     if person_crop.size == 0:
         return None
 
     try:
-        return extract_person_color_profile(person_crop)
+        return extract_person_color_profile(person_crop, hsv_crop=person_crop_hsv)
     except Exception as exc:
-        print(f"[WARN] person color extraction failed: {exc}")
+        logger.warning("person color extraction failed: %s", exc)
         return None
 
 
@@ -557,10 +908,15 @@ def _log_frame_summary(
     persons_on_frame: int,
     transport_on_frame: int,
 ) -> None:
-    print(
-        f"[frame #{raw.index:04d} @ {raw.timestamp_sec:6.3f}s] "
-        f"objects={objects_on_frame}, persons={persons_on_frame}, "
-        f"transport={transport_on_frame}, detections_raw={len(detections)}",
+    logger.info(
+        "[frame #%04d @ %6.3fs] objects=%d, persons=%d, transport=%d, "
+        "detections_raw=%d",
+        raw.index,
+        raw.timestamp_sec,
+        objects_on_frame,
+        persons_on_frame,
+        transport_on_frame,
+        len(detections),
     )
 
 
@@ -599,9 +955,13 @@ def _log_transport_analysis(
             f"normalized='{plate_result.normalized_plate}'"
         )
 
-    print(
-        f"[frame #{raw.index:04d} @ {raw.timestamp_sec:6.3f}s] "
-        f"TRANSPORT[{transport_index}] {color_part}; {plate_part}",
+    logger.debug(
+        "[frame #%04d @ %6.3fs] TRANSPORT[%d] %s; %s",
+        raw.index,
+        raw.timestamp_sec,
+        transport_index,
+        color_part,
+        plate_part,
     )
 
 
@@ -618,9 +978,13 @@ def _log_person_analysis(
         upper_part = _format_region_color("upper", profile.upper_color)
         lower_part = _format_region_color("lower", profile.lower_color)
 
-    print(
-        f"[frame #{raw.index:04d} @ {raw.timestamp_sec:6.3f}s] "
-        f"PERSON[{person_index}] {upper_part}; {lower_part}",
+    logger.debug(
+        "[frame #%04d @ %6.3fs] PERSON[%d] %s; %s",
+        raw.index,
+        raw.timestamp_sec,
+        person_index,
+        upper_part,
+        lower_part,
     )
 
 
@@ -89,7 +89,8 @@ async def get_snapshot_jpeg(
         timestamp_sec=timestamp_sec,
         video_source=video_url,
     )
-    framed = draw_bbox_on_frame(frame, bbox)
+    # Кадр только что извлечён и больше нигде не используется
+    framed = draw_bbox_on_frame(frame, bbox, inplace=True)
 
     # 5. Кодируем в JPEG
     ok, buffer = cv2.imencode(".jpg", framed)
@@ -14,3 +14,19 @@ DATA_DIR = PROJECT_ROOT / "data"
 VIDEO_SOURCE = "http://localhost:8000/media/f82163e0181d49468c29657336ffe179/index.m3u8"
 
 TARGET_FPS = 2.0
+
+# Максимум одновременно выполняющихся поисковых задач в одном процессе
+MAX_CONCURRENT_SEARCH_JOBS = 4
+
+# Размер батча для пакетной детекции объектов YOLO
+YOLO_DETECT_BATCH_SIZE = 16
+
+# Гибрид «детекция + трекинг»: полная YOLO-детекция раз в N кадров,
+# между ними боксы ведут лёгкие OpenCV-трекеры
+DETECT_EVERY_N_FRAMES = 5
+
+# Раз в сколько кадров сбрасывать накопленные INSERT'ы в БД одним батчем
+DB_FLUSH_EVERY_FRAMES = 32
+
+# Сколько кадров копить перед одним батчевым forward ruCLIP (эмбеддинги кадров)
+EMBED_BATCH_FRAMES = 8
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Protocol
+from typing import List, Optional, Protocol
 
 from app.domain.embedding import Embedding
 from app.domain.value_objects import EmbeddingId
@@ -11,5 +11,8 @@ class EmbeddingRepository(Protocol):
     async def create(self, embedding: Embedding) -> None:
         ...
 
+    async def create_many(self, embeddings: List[Embedding]) -> None:
+        ...
+
     async def find_by_id(self, embedding_id: EmbeddingId) -> Optional[Embedding]:
         ...
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Protocol, Optional
+from typing import List, Protocol, Optional
 
 from app.domain.frame import Frame
 from app.domain.value_objects import FrameId
@@ -10,5 +10,8 @@ class FrameRepository(Protocol):
     async def create(self, frame: Frame) -> None:
         ...
 
+    async def create_many(self, frames: List[Frame]) -> None:
+        ...
+
     async def find_by_id(self, frame_id: FrameId) -> Optional[Frame]:
         ...
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Protocol
+from typing import Dict, List, Optional, Protocol, Sequence
 
 from app.domain.object import Object
 from app.domain.value_objects import ObjectId
@@ -11,5 +11,14 @@ class ObjectRepository(Protocol):
     async def create(self, obj: Object) -> None:
         ...
 
+    async def create_many(self, objects: List[Object]) -> None:
+        ...
+
     async def find_by_id(self, object_id: ObjectId) -> Optional[Object]:
+        ...
+
+    async def find_by_ids(
+        self,
+        object_ids: Sequence[ObjectId],
+    ) -> Dict[str, Object]:
         ...
\ No newline at end of file
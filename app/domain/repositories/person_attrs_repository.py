@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Protocol
+from typing import List, Optional, Protocol
 
 from app.domain.attributes import PersonAttributes
 from app.domain.value_objects import PersonAttrsId
@@ -11,5 +11,8 @@ class PersonAttributesRepository(Protocol):
     async def create(self, attrs: PersonAttributes) -> None:
         ...
 
+    async def create_many(self, attrs_list: List[PersonAttributes]) -> None:
+        ...
+
     async def find_by_id(self, attrs_id: PersonAttrsId) -> Optional[PersonAttributes]:
         ...
\ No newline at end of file
@@ -11,3 +11,5 @@ class SearchJobRepository:
     async def update_status(self, job_id: SearchJobId, status: str, error: Optional[str]) -> None: ...
     async def find_all(self) -> List[SearchJob]: ...
     async def find_by_id(self, job_id: SearchJobId) -> Optional[SearchJob]: ...
+    async def claim_pending(self) -> Optional[SearchJob]: ...
+    async def claim_by_id(self, job_id: SearchJobId) -> bool: ...
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Protocol
+from typing import List, Optional, Protocol
 
 from app.domain.attributes import TransportAttributes
 from app.domain.value_objects import TransportAttrsId
@@ -11,5 +11,8 @@ class TransportAttributesRepository(Protocol):
     async def create(self, attrs: TransportAttributes) -> None:
         ...
 
+    async def create_many(self, attrs_list: List[TransportAttributes]) -> None:
+        ...
+
     async def find_by_id(self, attrs_id: TransportAttrsId) -> Optional[TransportAttributes]:
         ...
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import os
+import threading
 from enum import Enum
-from typing import NewType
+from typing import List, NewType
 from uuid import UUID
 
 FrameId = NewType("FrameId", UUID)
@@ -16,6 +18,39 @@ SearchJobId = NewType("SearchJobId", UUID)
 SearchJobResultId = NewType("SearchJobResultId", UUID)
 VectorizationJobId = NewType("VectorizationJobId", str)
 
+# Пул заранее сгенерированных UUID: str(uuid4()) дёргает os.urandom(16)
+# (системный вызов) на каждый id, что заметно на горячих путях вроде
+# эмбеддингов кадров/объектов. Здесь энтропия берётся одним вызовом
+# os.urandom на весь пул.
+_UUID_POOL_SIZE = 1024
+_uuid_pool: List[UUID] = []
+# id берут и поток event loop'а, и worker-потоки asyncio.to_thread
+# (эмбеддер); «if not _uuid_pool: ... pop()» без блокировки — это
+# check-then-act с гонкой, проигравший получает pop из пустого списка
+_uuid_pool_lock = threading.Lock()
+
+
+def new_uuid() -> UUID:
+    """
+    Случайный UUIDv4 из пула (один syscall на _UUID_POOL_SIZE значений).
+    Потокобезопасно: пополнение и pop — под одним lock'ом.
+    """
+    with _uuid_pool_lock:
+        if not _uuid_pool:
+            raw = os.urandom(16 * _UUID_POOL_SIZE)
+            _uuid_pool.extend(
+                UUID(bytes=raw[i:i + 16], version=4)
+                for i in range(0, len(raw), 16)
+            )
+        return _uuid_pool.pop()
+
+
+def new_uuid_str() -> str:
+    """
+    Строковая форма new_uuid() — для мест, где id хранится строкой.
+    """
+    return str(new_uuid())
+
 
 class ObjectType(str, Enum):
     PERSON = "PERSON"
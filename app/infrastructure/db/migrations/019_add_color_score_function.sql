@@ -0,0 +1,139 @@
+-- Цветовой скоринг на стороне Postgres.
+--
+-- Функция color_score зеркалирует Python-реализацию
+-- app/application/search/color_score.py (те же кусочно-линейные
+-- кривые и константы): скоринг кандидатов выполняется в том же
+-- запросе, что и их выборка, без скалярного Python-цикла.
+
+CREATE FUNCTION color_score(
+    query_color TEXT,
+    h DOUBLE PRECISION,
+    s DOUBLE PRECISION,
+    v DOUBLE PRECISION
+) RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+AS $$
+DECLARE
+    color TEXT := lower(btrim(query_color));
+    hh DOUBLE PRECISION := LEAST(GREATEST(h, 0.0), 360.0);
+    ss DOUBLE PRECISION := LEAST(GREATEST(s, 0.0), 1.0);
+    vv DOUBLE PRECISION := LEAST(GREATEST(v, 0.0), 1.0);
+    ref_h DOUBLE PRECISION;
+    d_raw DOUBLE PRECISION;
+    d_h DOUBLE PRECISION;
+    hue_score DOUBLE PRECISION;
+    s_comp DOUBLE PRECISION;
+    v_comp DOUBLE PRECISION;
+    score DOUBLE PRECISION;
+BEGIN
+    IF color = 'white' THEN
+        IF ss <= 0.1 THEN s_comp := 1.0;
+        ELSIF ss >= 0.4 THEN s_comp := 0.0;
+        ELSE s_comp := 1.0 - (ss - 0.1) / 0.3;
+        END IF;
+
+        IF vv <= 0.4 THEN v_comp := 0.0;
+        ELSIF vv >= 0.7 THEN v_comp := 1.0;
+        ELSE v_comp := (vv - 0.4) / 0.3;
+        END IF;
+
+        score := s_comp * v_comp;
+
+    ELSIF color = 'gray' THEN
+        IF ss <= 0.0 THEN s_comp := 1.0;
+        ELSIF ss >= 0.4 THEN s_comp := 0.0;
+        ELSE s_comp := 1.0 - ss / 0.4;
+        END IF;
+
+        IF vv <= 0.2 OR vv >= 0.9 THEN v_comp := 0.0;
+        ELSIF vv <= 0.5 THEN v_comp := (vv - 0.2) / 0.3;
+        ELSE v_comp := (0.9 - vv) / 0.4;
+        END IF;
+
+        score := s_comp * v_comp;
+
+    ELSIF color = 'black' THEN
+        IF vv <= 0.12 THEN score := 1.0;
+        ELSIF vv >= 0.50 THEN score := 0.0;
+        ELSE score := 1.0 - (vv - 0.12) / 0.38;
+        END IF;
+
+    ELSE
+        ref_h := CASE color
+            WHEN 'red' THEN 0.0
+            WHEN 'orange' THEN 30.0
+            WHEN 'yellow' THEN 55.0
+            WHEN 'green' THEN 120.0
+            WHEN 'blue' THEN 220.0
+            WHEN 'purple' THEN 275.0
+            WHEN 'brown' THEN 25.0
+        END;
+
+        -- Неизвестный цвет — явный 0.0, как в Python
+        IF ref_h IS NULL THEN
+            RETURN 0.0;
+        END IF;
+
+        -- Круговое расстояние по Hue, [0; 180]
+        d_raw := abs(hh - ref_h);
+        d_h := LEAST(d_raw, 360.0 - d_raw);
+
+        IF d_h >= 40.0 THEN hue_score := 0.0;
+        ELSE hue_score := 1.0 - d_h / 40.0;
+        END IF;
+
+        IF color = 'brown' THEN
+            s_comp := LEAST(GREATEST((ss - 0.3) / 0.5, 0.0), 1.0);
+
+            IF vv <= 0.1 OR vv >= 0.8 THEN v_comp := 0.0;
+            ELSIF vv <= 0.4 THEN v_comp := (vv - 0.1) / 0.3;
+            ELSE v_comp := (0.8 - vv) / 0.4;
+            END IF;
+
+            score := hue_score * s_comp * v_comp;
+        ELSE
+            s_comp := LEAST(GREATEST((ss - 0.05) / 0.45, 0.0), 1.0);
+
+            IF vv <= 0.1 THEN v_comp := 0.4;
+            ELSIF vv <= 0.4 THEN v_comp := 0.4 + (vv - 0.1) * 2.0;
+            ELSIF vv <= 0.8 THEN v_comp := 1.0;
+            ELSIF vv <= 0.95 THEN v_comp := 1.0 - (vv - 0.8) / 0.3;
+            ELSE v_comp := 0.5;
+            END IF;
+
+            score := hue_score * (s_comp + v_comp) / 2.0;
+        END IF;
+    END IF;
+
+    RETURN LEAST(GREATEST(score, 0.0), 1.0);
+END;
+$$;
+
+-- Обёртка для колонок с HSV в текстовом формате "h,s,v".
+-- NULL на любом входе или битая строка -> NULL (скор не считается).
+CREATE FUNCTION color_score_hsv(
+    query_color TEXT,
+    hsv TEXT
+) RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+AS $$
+DECLARE
+    h DOUBLE PRECISION;
+    s DOUBLE PRECISION;
+    v DOUBLE PRECISION;
+BEGIN
+    IF query_color IS NULL OR hsv IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    BEGIN
+        h := split_part(hsv, ',', 1)::DOUBLE PRECISION;
+        s := split_part(hsv, ',', 2)::DOUBLE PRECISION;
+        v := split_part(hsv, ',', 3)::DOUBLE PRECISION;
+    EXCEPTION WHEN OTHERS THEN
+        RETURN NULL;
+    END;
+
+    RETURN color_score(query_color, h, s, v);
+END;
+$$;
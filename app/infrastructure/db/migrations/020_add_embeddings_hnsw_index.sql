@@ -0,0 +1,8 @@
+-- ANN-индекс для серверного ранжирования эмбеддингов.
+--
+-- Поиск кандидатов теперь делает ORDER BY e.vector <=> $q LIMIT K
+-- прямо в Postgres; HNSW по косинусной метрике превращает линейный
+-- скан по всем эмбеддингам в приближённый поиск ближайших соседей.
+
+CREATE INDEX idx_embeddings_vector_hnsw
+    ON embeddings USING hnsw (vector vector_cosine_ops);
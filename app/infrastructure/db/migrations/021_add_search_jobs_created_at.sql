@@ -0,0 +1,11 @@
+-- created_at для очереди задач поиска: атомарный забор PENDING-задач
+-- (FOR UPDATE SKIP LOCKED) должен обрабатывать их в порядке создания.
+
+ALTER TABLE search_jobs
+    ADD COLUMN created_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- Частичный индекс только по PENDING: забор очередной задачи —
+-- индексный поиск по маленькому подмножеству, а не скан всех задач.
+CREATE INDEX idx_search_jobs_pending_created_at
+    ON search_jobs (created_at)
+    WHERE status = 'PENDING';
@@ -0,0 +1,14 @@
+-- Эмбеддинги в half precision (halfvec, 2 байта на компоненту).
+--
+-- Векторы L2-нормированы, косинусные дистанции устойчивы к fp16 —
+-- вдвое меньше места на диске/в shared_buffers и быстрее расчёт
+-- дистанций при том же серверном ранжировании через <=>.
+
+DROP INDEX idx_embeddings_vector_hnsw;
+
+ALTER TABLE embeddings
+    ALTER COLUMN vector TYPE halfvec(512)
+    USING vector::halfvec(512);
+
+CREATE INDEX idx_embeddings_vector_hnsw
+    ON embeddings USING hnsw (vector halfvec_cosine_ops);
@@ -0,0 +1,29 @@
+-- Числовые HSV-компоненты вместо разбора строки "h,s,v" на каждый
+-- поисковый запрос.
+--
+-- Колонки GENERATED ... STORED: парсинг происходит один раз при записи
+-- строки атрибутов, писатели (репозитории) продолжают класть текст,
+-- а скоринг читает готовые real-значения.
+
+-- NULLIF: писатели кладут "" для объектов без цветового профиля
+-- (и такие строки уже есть в данных), голый ::real на пустой строке
+-- уронил бы и саму миграцию, и каждый последующий INSERT такой строки.
+ALTER TABLE transport_attrs
+    ADD COLUMN color_h REAL GENERATED ALWAYS AS (NULLIF(split_part(color_hsv, ',', 1), '')::real) STORED,
+    ADD COLUMN color_s REAL GENERATED ALWAYS AS (NULLIF(split_part(color_hsv, ',', 2), '')::real) STORED,
+    ADD COLUMN color_v REAL GENERATED ALWAYS AS (NULLIF(split_part(color_hsv, ',', 3), '')::real) STORED;
+
+ALTER TABLE person_attrs
+    ADD COLUMN upper_color_h REAL GENERATED ALWAYS AS (NULLIF(split_part(upper_color_hsv, ',', 1), '')::real) STORED,
+    ADD COLUMN upper_color_s REAL GENERATED ALWAYS AS (NULLIF(split_part(upper_color_hsv, ',', 2), '')::real) STORED,
+    ADD COLUMN upper_color_v REAL GENERATED ALWAYS AS (NULLIF(split_part(upper_color_hsv, ',', 3), '')::real) STORED,
+    ADD COLUMN lower_color_h REAL GENERATED ALWAYS AS (NULLIF(split_part(lower_color_hsv, ',', 1), '')::real) STORED,
+    ADD COLUMN lower_color_s REAL GENERATED ALWAYS AS (NULLIF(split_part(lower_color_hsv, ',', 2), '')::real) STORED,
+    ADD COLUMN lower_color_v REAL GENERATED ALWAYS AS (NULLIF(split_part(lower_color_hsv, ',', 3), '')::real) STORED;
+
+-- NULL на любом входе (нет цвета в запросе / нет атрибута) -> NULL,
+-- как раньше возвращала color_score_hsv.
+ALTER FUNCTION color_score(TEXT, DOUBLE PRECISION, DOUBLE PRECISION, DOUBLE PRECISION) STRICT;
+
+-- Текстовая обёртка больше не нужна: скоринг берёт числовые колонки.
+DROP FUNCTION color_score_hsv(TEXT, TEXT);
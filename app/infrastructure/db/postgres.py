@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from dataclasses import dataclass
 from typing import Any, Optional, Callable, Awaitable
@@ -9,6 +10,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Отключение ожидания fsync WAL на коммите для батчевых вставок
+# видеотелеметрии (frames/objects/embeddings/attrs). Эти данные
+# «lossy-ok»: при падении сервера БД видео просто переобрабатывается,
+# поэтому коммит может не ждать сброса WAL на диск. Прод включает явно.
+_INGEST_SYNC_COMMIT_OFF = os.getenv(
+    "VIDEO_INGEST_SYNC_COMMIT_OFF", "false",
+).lower() in ("1", "true", "yes")
+
 
 @dataclass(frozen=True)
 class PostgresConfig:
@@ -117,4 +126,55 @@ class PostgresDatabase:
             raise RuntimeError("PostgresDatabase is not connected")
 
         async with self._pool.acquire() as connection:
-            return await func(connection)
\ No newline at end of file
+            return await func(connection)
+
+    async def with_bulk_insert_connection(
+        self,
+        func: Callable[[asyncpg.Connection], Awaitable[Any]],
+    ) -> Any:
+        """
+        Как with_connection, но соединение отдаётся внутри транзакции,
+        и при включённом VIDEO_INGEST_SYNC_COMMIT_OFF коммит не ждёт
+        fsync WAL (SET LOCAL synchronous_commit = off). Использовать
+        только для append-only батчей, которые не страшно потерять
+        при падении сервера; SET LOCAL действует лишь до конца этой
+        транзакции и не трогает остальные запросы пула.
+        """
+        if self._pool is None:
+            raise RuntimeError("PostgresDatabase is not connected")
+
+        async with self._pool.acquire() as connection:
+            async with connection.transaction():
+                if _INGEST_SYNC_COMMIT_OFF:
+                    await connection.execute(
+                        "SET LOCAL synchronous_commit = off",
+                    )
+                return await func(connection)
+
+
+# Общий на процесс экземпляр PostgresDatabase.
+#
+# Фоновые воркеры раньше создавали свежий пул на каждую задачу
+# (TCP + auth на каждый connect и риск упереться в max_connections);
+# вместо этого все берут один разделяемый пул и никогда его не закрывают —
+# он живёт столько же, сколько процесс.
+_shared_db: Optional[PostgresDatabase] = None
+_shared_db_lock = asyncio.Lock()
+
+
+async def get_shared_database() -> PostgresDatabase:
+    """
+    Ленивая инициализация общего PostgresDatabase (один пул на процесс).
+    """
+    global _shared_db
+
+    if _shared_db is not None:
+        return _shared_db
+
+    async with _shared_db_lock:
+        if _shared_db is None:
+            db = PostgresDatabase(load_config_from_env())
+            await db.connect()
+            _shared_db = db
+
+    return _shared_db
\ No newline at end of file
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Optional, List, Any
 
+import numpy as np
 from asyncpg import Record
 
 from app.domain.embedding import Embedding
@@ -19,9 +20,15 @@ def _vector_to_literal(values: List[float]) -> str:
     """
     Преобразует список чисел в строку формата, понятного pgvector.
 
+    Компоненты предварительно квантуются в fp16: колонка — halfvec,
+    сервер всё равно усечёт значения до half precision, а короткий
+    shortest-repr float16 (~5 символов против ~19 у полного float)
+    втрое сокращает байты литерала на проводе и время его парсинга.
+
     Пример: [0.1, 0.2, 0.3] -> "[0.1,0.2,0.3]"
     """
-    inner = ",".join(str(v) for v in values)
+    half = np.asarray(values, dtype=np.float16)
+    inner = ",".join(str(v) for v in half)
     return f"[{inner}]"
 
 
@@ -79,6 +86,37 @@ class EmbeddingPostgresRepository(EmbeddingRepository):
             vector_literal,               # <-- передаём строку, которую парсит pgvector
         )
 
+    async def create_many(self, embeddings: List[Embedding]) -> None:
+        """
+        Вставляет пачку эмбеддингов одним executemany: один prepared
+        statement и один protocol round-trip на весь батч вместо
+        INSERT на строку. COPY не используем сознательно — бинарная
+        передача vector-колонки потребовала бы отдельного кодека.
+        """
+        if not embeddings:
+            return
+
+        sql = """
+        INSERT INTO embeddings (id, entity_type, frame_id, object_id, vector)
+        VALUES ($1, $2, $3, $4, $5);
+        """
+
+        records = [
+            (
+                embedding.id,
+                embedding.entity_type.value,
+                embedding.frame_id,
+                embedding.object_id,
+                _vector_to_literal(embedding.vector),
+            )
+            for embedding in embeddings
+        ]
+
+        async def _insert_all(connection) -> None:
+            await connection.executemany(sql, records)
+
+        await self._db.with_bulk_insert_connection(_insert_all)
+
     async def find_by_id(self, embedding_id: EmbeddingId) -> Optional[Embedding]:
         sql = """
         SELECT id, entity_type, frame_id, object_id, vector
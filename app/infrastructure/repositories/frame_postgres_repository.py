@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 
 from asyncpg import Record
 
@@ -30,6 +30,30 @@ class FramePostgresRepository(FrameRepository):
             frame.at,
         )
 
+    async def create_many(self, frames: List[Frame]) -> None:
+        """
+        Вставляет пачку кадров одним executemany: один prepared
+        statement и один protocol round-trip на весь батч вместо
+        INSERT (и fsync) на строку.
+        """
+        if not frames:
+            return
+
+        sql = """
+        INSERT INTO frames (id, timestamp_sec, source_id, at)
+        VALUES ($1, $2, $3, $4);
+        """
+
+        records = [
+            (frame.id, frame.timestamp_sec, frame.source_id, frame.at)
+            for frame in frames
+        ]
+
+        async def _insert_all(connection) -> None:
+            await connection.executemany(sql, records)
+
+        await self._db.with_bulk_insert_connection(_insert_all)
+
     async def find_by_id(self, frame_id: FrameId) -> Optional[Frame]:
         """
         Returns frame entity by id.
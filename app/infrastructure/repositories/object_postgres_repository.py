@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 
 from asyncpg import Record
 
@@ -48,6 +48,47 @@ class ObjectPostgresRepository(ObjectRepository):
             obj.track_id,          # может быть None
         )
 
+    async def create_many(self, objects: List[Object]) -> None:
+        """
+        Вставляет пачку объектов одним executemany — один round-trip
+        на батч вместо INSERT на строку.
+        """
+        if not objects:
+            return
+
+        sql = """
+        INSERT INTO objects (
+            id,
+            frame_id,
+            type,
+            bbox_x,
+            bbox_y,
+            bbox_width,
+            bbox_height,
+            track_id
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8);
+        """
+
+        records = [
+            (
+                obj.id,
+                obj.frame_id,
+                obj.type.value,
+                obj.bbox.x,
+                obj.bbox.y,
+                obj.bbox.width,
+                obj.bbox.height,
+                obj.track_id,
+            )
+            for obj in objects
+        ]
+
+        async def _insert_all(connection) -> None:
+            await connection.executemany(sql, records)
+
+        await self._db.with_bulk_insert_connection(_insert_all)
+
     async def find_by_id(self, object_id: ObjectId) -> Optional[Object]:
         """
         Находит объект по id или возвращает None.
@@ -72,6 +113,39 @@ class ObjectPostgresRepository(ObjectRepository):
 
         return self._map_row_to_object(row)
 
+    async def find_by_ids(
+        self,
+        object_ids: Sequence[ObjectId],
+    ) -> Dict[str, Object]:
+        """
+        Находит объекты по списку id одним запросом (id = ANY($1)).
+        Возвращает словарь str(id) -> Object; отсутствующие id просто
+        не попадают в результат.
+        """
+        if not object_ids:
+            return {}
+
+        sql = """
+        SELECT
+            id,
+            frame_id,
+            type,
+            bbox_x,
+            bbox_y,
+            bbox_width,
+            bbox_height,
+            track_id
+        FROM objects
+        WHERE id = ANY($1);
+        """
+
+        rows = await self._db.fetch(sql, list(object_ids))
+
+        return {
+            str(row["id"]): self._map_row_to_object(row)
+            for row in rows
+        }
+
     @staticmethod
     def _map_row_to_object(row: Record) -> Object:
         """
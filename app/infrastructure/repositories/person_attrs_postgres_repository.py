@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 
 from asyncpg import Record
 
@@ -28,6 +28,28 @@ class PersonAttributesPostgresRepository(PersonAttributesRepository):
             attrs.lower_color_hsv,
         )
 
+    async def create_many(self, attrs_list: List[PersonAttributes]) -> None:
+        """
+        Вставляет пачку атрибутов людей одним executemany.
+        """
+        if not attrs_list:
+            return
+
+        sql = """
+        INSERT INTO person_attrs (id, object_id, upper_color_hsv, lower_color_hsv)
+        VALUES ($1, $2, $3, $4);
+        """
+
+        records = [
+            (attrs.id, attrs.object_id, attrs.upper_color_hsv, attrs.lower_color_hsv)
+            for attrs in attrs_list
+        ]
+
+        async def _insert_all(connection) -> None:
+            await connection.executemany(sql, records)
+
+        await self._db.with_bulk_insert_connection(_insert_all)
+
     async def find_by_id(self, attrs_id: PersonAttrsId) -> Optional[PersonAttributes]:
         sql = """
         SELECT id, object_id, upper_color_hsv, lower_color_hsv
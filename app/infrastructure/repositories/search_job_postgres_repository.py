@@ -78,6 +78,62 @@ class SearchJobPostgresRepository(SearchJobRepository):
         row = await self._db.fetchrow(sql, job_id)
         return None if row is None else self._map(row)
 
+    async def claim_pending(self) -> Optional[SearchJob]:
+        """
+        Атомарно забирает одну PENDING-задачу (самую старую) и переводит
+        её в RUNNING одним round-trip'ом. FOR UPDATE SKIP LOCKED
+        гарантирует, что параллельные воркеры не возьмут одну и ту же
+        задачу. None — очередь пуста.
+        """
+        sql = """
+        WITH claimed AS (
+            UPDATE search_jobs
+            SET status = 'RUNNING'
+            WHERE id = (
+                SELECT id
+                FROM search_jobs
+                WHERE status = 'PENDING'
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, title, text_query, source_id, start_at, end_at,
+                      status, progress, error
+        )
+        SELECT c.id,
+               c.title,
+               c.text_query,
+               c.source_id,
+               c.start_at,
+               c.end_at,
+               c.status,
+               c.progress,
+               c.error,
+               s.source_type_id,
+               s.name AS source_name
+        FROM claimed AS c
+                 LEFT JOIN sources AS s
+                           ON s.source_id = c.source_id;
+        """
+        row = await self._db.fetchrow(sql)
+        return None if row is None else self._map(row)
+
+    async def claim_by_id(self, job_id: SearchJobId) -> bool:
+        """
+        Атомарно переводит конкретную задачу из PENDING в RUNNING.
+        False — задачу уже забрал другой процесс (или её нет): условие
+        по status в UPDATE гарантирует, что из двух претендентов
+        (локальный spawn в API и воркер из NOTIFY) выиграет ровно один.
+        """
+        sql = """
+        UPDATE search_jobs
+        SET status = 'RUNNING'
+        WHERE id = $1 AND status = 'PENDING'
+        RETURNING id;
+        """
+        row = await self._db.fetchrow(sql, job_id)
+        return row is not None
+
     @staticmethod
     def _map(row: Record) -> SearchJob:
         return SearchJob(
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
 
 from asyncpg import Record
 
@@ -28,6 +28,28 @@ class TransportAttributesPostgresRepository(TransportAttributesRepository):
             attrs.license_plate,
         )
 
+    async def create_many(self, attrs_list: List[TransportAttributes]) -> None:
+        """
+        Вставляет пачку атрибутов ТС одним executemany.
+        """
+        if not attrs_list:
+            return
+
+        sql = """
+        INSERT INTO transport_attrs (id, object_id, color_hsv, license_plate)
+        VALUES ($1, $2, $3, $4);
+        """
+
+        records = [
+            (attrs.id, attrs.object_id, attrs.color_hsv, attrs.license_plate)
+            for attrs in attrs_list
+        ]
+
+        async def _insert_all(connection) -> None:
+            await connection.executemany(sql, records)
+
+        await self._db.with_bulk_insert_connection(_insert_all)
+
     async def find_by_id(self, attrs_id: TransportAttrsId) -> Optional[TransportAttributes]:
         sql = """
         SELECT id, object_id, color_hsv, license_plate
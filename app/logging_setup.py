@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_LISTENER: Optional[QueueListener] = None
+
+
+def setup_logging() -> None:
+    """
+    Настраивает логирование через очередь: горячие пути только кладут
+    записи в queue.SimpleQueue (QueueHandler), а форматирование и запись
+    в stdout выполняет фоновый поток QueueListener. Синхронный stdio
+    (flush + лок интерпретатора на каждый print) уходит из цикла
+    обработки кадров.
+
+    Уровень задаётся переменной окружения LOG_LEVEL (по умолчанию INFO);
+    детальные пер-объектные логи пайплайна живут на DEBUG.
+
+    Повторные вызовы — no-op, listener останавливается через atexit.
+    """
+    global _LISTENER
+    if _LISTENER is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"),
+    )
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(QueueHandler(log_queue))
+
+    _LISTENER = QueueListener(log_queue, stream_handler)
+    _LISTENER.start()
+    atexit.register(_LISTENER.stop)
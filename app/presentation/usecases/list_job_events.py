@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
-from app.domain.value_objects import SearchJobId, ObjectId
+from app.domain.value_objects import SearchJobId
 from app.infrastructure.db.postgres import PostgresDatabase, load_config_from_env
 from app.infrastructure.repositories.search_job_postgres_repository import (
     SearchJobPostgresRepository,
@@ -30,35 +30,6 @@ async def _list_job_events_internal(
     # Все события, которые воркер уже сохранил
     events = await event_repo.find_by_job_id(job_id)
 
-    # --- helper-функции -----------------------------------------------------
-
-    async def _fetch_at_for_object(obj_id: ObjectId) -> Optional[str]:
-        row = await db.fetchrow(
-            """
-            SELECT f.at
-            FROM objects o
-            JOIN frames f ON o.frame_id = f.id
-            WHERE o.id = $1
-            """,
-            obj_id,
-        )
-        if row is None:
-            return None
-        return row["at"]
-
-    async def _fetch_at_for_frame(frame_id: str) -> Optional[str]:
-        row = await db.fetchrow(
-            """
-            SELECT at
-            FROM frames
-            WHERE id = $1
-            """,
-            frame_id,
-        )
-        if row is None:
-            return None
-        return row["at"]
-
     items: List[Dict[str, Any]] = []
 
     # -----------------------------------------------------------------------
@@ -67,6 +38,21 @@ async def _list_job_events_internal(
     object_events = [e for e in events if e.object_id is not None]
 
     if object_events:
+        # at для всех объектов одним запросом (WHERE id = ANY),
+        # вместо fetchrow на каждое событие: N round-trip'ов -> 1.
+        at_rows = await db.fetch(
+            """
+            SELECT o.id AS object_id, f.at
+            FROM objects o
+            JOIN frames f ON o.frame_id = f.id
+            WHERE o.id = ANY($1::uuid[])
+            """,
+            [e.object_id for e in object_events],
+        )
+        at_by_object: Dict[str, str] = {
+            str(row["object_id"]): row["at"] for row in at_rows
+        }
+
         by_track: Dict[int, List[Any]] = {}
         single_events: List[Any] = []
 
@@ -86,7 +72,7 @@ async def _list_job_events_internal(
             ats: List[str] = []
             for ev in group:
                 assert ev.object_id is not None
-                at_ev = await _fetch_at_for_object(ev.object_id)
+                at_ev = at_by_object.get(str(ev.object_id))
                 if at_ev is not None:
                     ats.append(at_ev)
 
@@ -97,7 +83,7 @@ async def _list_job_events_internal(
             end_at = max(ats)
 
             # at для превью (лучший объект)
-            preview_at = await _fetch_at_for_object(best.object_id)
+            preview_at = at_by_object.get(str(best.object_id))
             if preview_at is None:
                 continue
 
@@ -125,7 +111,7 @@ async def _list_job_events_internal(
         for e in single_events:
             assert e.object_id is not None
 
-            at = await _fetch_at_for_object(e.object_id)
+            at = at_by_object.get(str(e.object_id))
             if at is None:
                 continue
 
@@ -176,8 +162,19 @@ async def _list_job_events_internal(
     if not frame_hits:
         return []
 
+    # at для всех кадров одним запросом, по той же схеме, что и объекты
+    frame_rows = await db.fetch(
+        """
+        SELECT id, at
+        FROM frames
+        WHERE id = ANY($1::uuid[])
+        """,
+        [hit.frame_id for hit in frame_hits],
+    )
+    at_by_frame: Dict[str, str] = {str(row["id"]): row["at"] for row in frame_rows}
+
     for hit in frame_hits:
-        at = await _fetch_at_for_frame(hit.frame_id)
+        at = at_by_frame.get(str(hit.frame_id))
         if at is None:
             continue
 
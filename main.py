@@ -5,6 +5,9 @@ import os
 from fastapi import FastAPI
 import uvicorn
 
+from app.logging_setup import setup_logging
+from app.application.video.object_detector import warmup_object_detector
+from app.application.video.plate_detector import warmup_plate_detector
 from app.presentation.http.snapshot import router as snapshot_router
 from app.presentation.http.search_router import router as search_router
 
@@ -12,6 +15,8 @@ APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = int(os.getenv("APP_PORT", "8001"))
 
 
+setup_logging()
+
 app = FastAPI()
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -28,6 +33,17 @@ app.include_router(search_router)
 app.include_router(snapshot_router)
 
 
+@app.on_event("startup")
+async def _warmup_models() -> None:
+    # Прогреваем YOLO-модели на старте: иначе первый реальный кадр
+    # платит за загрузку весов и автотюнинг бэкенда
+    try:
+        warmup_object_detector()
+        warmup_plate_detector()
+    except Exception as exc:
+        print(f"[WARN] model warmup failed: {exc}")
+
+
 if __name__ == "__main__":
     # Для reload нужно указывать строку "main:app",
     # иначе uvicorn не сможет отслеживать изменения в файлах
@@ -58,6 +58,10 @@ pip install \
   matplotlib \
   pandas
 
-pip install pytesseract rapidfuzz
+pip install pytesseract rapidfuzz pyahocorasick numba
 
-pip install asyncpg python-dotenv scipy
\ No newline at end of file
+pip install asyncpg python-dotenv scipy uvloop av
+
+# tesserocr опционален (нужны dev-заголовки tesseract); без него OCR
+# работает через pytesseract
+pip install tesserocr || true
\ No newline at end of file